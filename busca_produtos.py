@@ -0,0 +1,176 @@
+# busca_produtos.py
+
+import bisect
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# Colunas em que a barra de busca procura
+COLUNAS_BUSCA = ['NOME', 'DESCRICAOLONGA', 'DESCRICAOCURTA', 'CATEGORIA']
+
+# Quantos prefixos curtos (que juntam várias palavras) guardar prontos: cada tecla
+# digitada é uma consulta nova, e 'b', 'ba'... repetem muito entre as sessões
+MAX_PREFIXOS_EM_CACHE = 64
+
+# Busca aproximada: fração mínima dos trigramas do termo que o nome precisa ter
+LIMIAR_SIMILARIDADE = 0.4
+
+_PADRAO_TOKEN = r'\w+'
+_ACENTOS = '[\u0300-\u036f]'  # marcas de acento que o NFKD separa da letra
+
+
+def normalizar_texto(texto):
+    """'Bátom Líquido' -> 'batom liquido' (sem acentos e sem diferença de maiúsculas)."""
+    texto = unicodedata.normalize('NFKD', str(texto))
+    return re.sub(_ACENTOS, '', texto).casefold()
+
+
+def tokenizar(texto):
+    """Palavras do texto já normalizado (ver normalizar_texto)."""
+    return re.findall(_PADRAO_TOKEN, normalizar_texto(texto))
+
+
+def trigramas(texto):
+    """
+    Trigramas das palavras do texto, com espaços nas pontas de cada palavra (como no
+    pg_trgm): 'Bátom' -> {'  b', ' ba', 'bat', 'ato', 'tom', 'om '}.
+    """
+    conjunto = set()
+    for palavra in tokenizar(texto):
+        palavra = f"  {palavra} "
+        conjunto.update(palavra[i:i + 3] for i in range(len(palavra) - 2))
+    return conjunto
+
+
+class IndiceBusca:
+    """
+    Índice invertido da barra de busca: palavra normalizada -> IDs dos produtos que a
+    têm em alguma das COLUNAS_BUSCA. Montado uma vez por versão do catálogo.
+
+    buscar('bat liq') retorna os IDs que têm uma palavra começando com 'bat' E uma
+    começando com 'liq' (acentos e maiúsculas não importam). As palavras ficam em uma
+    lista ordenada, então cada prefixo é uma busca binária, sem percorrer os produtos.
+    """
+
+    def __init__(self, df_produtos):
+        self.ids = frozenset(df_produtos['ID']) if 'ID' in df_produtos.columns else frozenset()
+        self._termos = []
+        self._ids_por_termo = []
+        self._cache = {}
+        colunas = [coluna for coluna in COLUNAS_BUSCA if coluna in df_produtos.columns]
+        if not colunas or df_produtos.empty:
+            return
+
+        df_produtos = df_produtos.reset_index(drop=True)
+        ids_produtos = df_produtos['ID'].to_numpy()
+        partes = []
+        for coluna in colunas:
+            textos = df_produtos[coluna].dropna().astype(str)
+            palavras = (
+                textos.str.normalize('NFKD')
+                .str.replace(_ACENTOS, '', regex=True)
+                .str.casefold()
+                .str.findall(_PADRAO_TOKEN)
+                .explode()
+                .dropna()
+            )
+            partes.append(pd.DataFrame({
+                'TERMO': palavras.to_numpy(),
+                'ID': ids_produtos[palavras.index.to_numpy(dtype=int)],
+            }))
+        termos = pd.concat(partes, ignore_index=True).drop_duplicates()
+        for termo, ids in termos.groupby('TERMO', sort=True)['ID']:
+            self._termos.append(termo)
+            self._ids_por_termo.append(frozenset(ids.tolist()))
+
+    def buscar(self, termo):
+        """IDs dos produtos que casam com todas as palavras de 'termo' (todos, se não houver palavra)."""
+        palavras = tokenizar(termo)
+        if not palavras:
+            return self.ids
+        resultado = None
+        # A palavra mais longa costuma ter menos produtos: começa por ela
+        for palavra in sorted(set(palavras), key=len, reverse=True):
+            ids = self._ids_com_prefixo(palavra)
+            resultado = ids if resultado is None else resultado & ids
+            if not resultado:
+                return frozenset()
+        return resultado
+
+    def _ids_com_prefixo(self, prefixo):
+        ids = self._cache.get(prefixo)
+        if ids is None:
+            inicio = bisect.bisect_left(self._termos, prefixo)
+            fim = bisect.bisect_left(self._termos, prefixo + '\U0010ffff', lo=inicio)
+            if fim - inicio <= 1:
+                return self._ids_por_termo[inicio] if fim > inicio else frozenset()
+            ids = frozenset().union(*self._ids_por_termo[inicio:fim])
+            if len(self._cache) >= MAX_PREFIXOS_EM_CACHE:
+                self._cache.clear()
+            self._cache[prefixo] = ids
+        return ids
+
+
+class IndiceTrigramas:
+    """
+    Índice de trigramas dos nomes dos produtos, para a busca tolerar erros de digitação
+    ('batmo' acha 'Batom') e para as sugestões da barra de busca. Montado uma vez por
+    versão do catálogo.
+
+    A semelhança de um nome com o termo é a fração dos trigramas do termo que aparecem
+    no nome. Cada trigrama guarda as posições dos produtos que o têm, então uma consulta
+    só soma as listas dos trigramas do termo (np.bincount), sem percorrer os nomes.
+    Empates são desempatados pelos produtos em promoção e depois pelos mais recentes.
+    """
+
+    def __init__(self, df_produtos):
+        df_produtos = df_produtos.reset_index(drop=True)
+        total = len(df_produtos)
+        self._ids = df_produtos['ID'].to_numpy() if 'ID' in df_produtos.columns else np.arange(total)
+        nomes = df_produtos['NOME'] if 'NOME' in df_produtos.columns else pd.Series([''] * total)
+        self._nomes = nomes.to_numpy()
+        if 'PRECO_PROMOCIONAL' in df_produtos.columns:
+            self._promocao = df_produtos['PRECO_PROMOCIONAL'].notna().to_numpy()
+        else:
+            self._promocao = np.zeros(total, dtype=bool)
+        if 'RECENCIA' in df_produtos.columns:
+            self._recencia = pd.to_numeric(df_produtos['RECENCIA'], errors='coerce').fillna(0).to_numpy(dtype='float64')
+        else:
+            self._recencia = np.zeros(total)
+
+        posicoes_por_trigrama = {}
+        lidos = {}  # Nomes repetidos (ex.: variações) são quebrados em trigramas uma vez
+        for posicao, nome in enumerate(self._nomes):
+            if pd.isna(nome):
+                continue
+            if nome not in lidos:
+                lidos[nome] = trigramas(nome)
+            for trigrama in lidos[nome]:
+                posicoes_por_trigrama.setdefault(trigrama, []).append(posicao)
+        self._posicoes = {
+            trigrama: np.asarray(posicoes, dtype=np.int64) for trigrama, posicoes in posicoes_por_trigrama.items()
+        }
+
+    def _ranking(self, termo, limite):
+        """Posições dos produtos parecidos com 'termo', da mais parecida para a menos."""
+        do_termo = trigramas(termo)
+        total_termo = len(do_termo)
+        do_termo = [self._posicoes[t] for t in do_termo if t in self._posicoes]
+        if not do_termo:
+            return np.empty(0, dtype=np.int64)
+        acertos = np.bincount(np.concatenate(do_termo), minlength=len(self._ids))
+        candidatos = np.flatnonzero(acertos >= LIMIAR_SIMILARIDADE * total_termo)
+        semelhanca = acertos[candidatos] / total_termo
+        ordem = np.lexsort((-self._recencia[candidatos], ~self._promocao[candidatos], -semelhanca))
+        return candidatos[ordem[:limite]]
+
+    def buscar(self, termo, limite=None):
+        """IDs dos produtos cujo nome parece com 'termo', do mais parecido para o menos."""
+        return self._ids[self._ranking(termo, limite)].tolist()
+
+    def sugestoes(self, termo, quantidade=5):
+        """Até 'quantidade' pares (ID, NOME) para o autocompletar da barra de busca."""
+        posicoes = self._ranking(termo, quantidade)
+        return list(zip(self._ids[posicoes].tolist(), self._nomes[posicoes].tolist()))
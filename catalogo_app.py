@@ -16,8 +16,9 @@ from carrinho_ui import render_carrinho_popover
 
 # Importa as funções e constantes dos novos módulos
 from data_handler import (
-    carregar_catalogo, carregar_cupons, carregar_clientes_cashback, buscar_cliente_cashback,
-    salvar_pedido, BACKGROUND_IMAGE_URL, LOGO_DOCEBELLA_URL, NUMERO_WHATSAPP
+    carregar_cupons, buscar_cliente_cashback, carregar_dados_iniciais, salvar_pedido,
+    indices_catalogo, arquivos_desatualizados,
+    BACKGROUND_IMAGE_URL, LOGO_DOCEBELLA_URL, NUMERO_WHATSAPP
 )
 from ui_components import (
     adicionar_qtd_ao_carrinho, remover_do_carrinho, limpar_carrinho,
@@ -43,15 +44,11 @@ if 'cupom_mensagem' not in st.session_state:
 if 'processando_pedido' not in st.session_state:
     st.session_state.processando_pedido = False
 
-# OTIMIZAÇÃO: Cache do catálogo principal no estado da sessão para evitar re-leitura constante
-if 'df_catalogo_indexado' not in st.session_state:
-    st.session_state.df_catalogo_indexado = None
-
-# --- Inicializa Dados (Uma vez) ---
-if st.session_state.df_catalogo_indexado is None:
-    st.session_state.df_catalogo_indexado = carregar_catalogo()
-
-DF_CLIENTES_CASH = carregar_clientes_cashback()
+# --- Inicializa Dados ---
+# A cada rerun pega a versão publicada pelo atualizador em segundo plano (só troca de
+# referência, sem acessar o GitHub). Na primeira carga, catálogo, cashback e cupons
+# são baixados em paralelo.
+st.session_state.df_catalogo_indexado, DF_CLIENTES_CASH = carregar_dados_iniciais()
 
 # --- ADICIONA O CONTROLE DE ESTADO PARA A TELA DE DETALHES ---
 if 'produto_detalhe_id' not in st.session_state:
@@ -572,15 +569,13 @@ if st.session_state.produto_detalhe_id:
     st.stop()
 
 # --- Filtros e Exibição dos Produtos ---
-df_catalogo_completo = st.session_state.df_catalogo_indexado.reset_index()
+indices = indices_catalogo(st.session_state.df_catalogo_indexado)
 
-# === FILTRO CRÍTICO: MANTÉM APENAS PRODUTOS PRINCIPAIS (PAIS) ===
-# Faça o filtro UMA VEZ e guarde em uma nova variável
-df_produtos_principais = df_catalogo_completo[df_catalogo_completo['PAIID'].isna()].copy()
+# === APENAS PRODUTOS PRINCIPAIS (PAIS) ===
+# Filtro e categorias já calculados na carga do catálogo (não são refeitos a cada rerun)
+df_produtos_principais = indices.produtos_principais
 
-# Use o DataFrame já filtrado para tudo
-categorias = df_produtos_principais['CATEGORIA'].dropna().astype(str).unique().tolist() if 'CATEGORIA' in df_produtos_principais.columns else ["TODAS AS CATEGORIAS"]
-categorias.sort()
+categorias = list(indices.categorias)
 categorias.insert(0, "TODAS AS CATEGORIAS")
 
 # --- NOVO CABEÇALHO ---
@@ -602,6 +597,13 @@ with col_search:
         label_visibility="collapsed",
         placeholder="🔍 Buscar produtos..."
     )
+    # Autocompletar: nomes mais parecidos com o que foi digitado (índice de trigramas)
+    termo_digitado = st.session_state.get('termo_pesquisa_barra', '')
+    if termo_digitado.strip():
+        for sugestao_id, sugestao_nome in indices.trigramas.sugestoes(termo_digitado, quantidade=5):
+            if st.button(str(sugestao_nome), key=f'sugestao_{sugestao_id}'):
+                st.session_state.produto_detalhe_id = sugestao_id
+                st.rerun()
 
 with col_cats:
     termo = st.session_state.get('termo_pesquisa_barra', '').lower()
@@ -645,6 +647,13 @@ st.markdown(
 # --- Adiciona a área de conteúdo para o conteúdo abaixo ---
 st.markdown('<div class="main-content-area">', unsafe_allow_html=True)
 
+# Fonte de dados fora do ar: avisa que estamos mostrando a última cópia boa
+desatualizados = arquivos_desatualizados()
+if desatualizados:
+    desde = min(desatualizados.values()).strftime('%d/%m %H:%M')
+    st.caption(f"⚠️ Alguns dados podem estar desatualizados (a atualização falha desde {desde}: "
+               f"{', '.join(sorted(desatualizados))}).")
+
 # Definimos as colunas para ordem e grade
 col_select_ordem, col_grade_opcoes, _ = st.columns([1, 1, 2])
 
@@ -659,9 +668,18 @@ categoria_selecionada = st.session_state.get('filtro_categoria_radio', 'TODAS AS
 df_filtrado = df_produtos_principais.copy()
 
 # Agora o filtro é aplicado sobre o DataFrame correto
+busca_aproximada = False
 if termo:
     # Se há um termo de busca, ele tem prioridade sobre a categoria
-    df_filtrado = df_filtrado[df_filtrado.apply(lambda row: termo in str(row['NOME']).lower() or termo in str(row['DESCRICAOLONGA']).lower(), axis=1)]
+    # Índice invertido montado com o catálogo (sem acento/maiúsculas, por prefixo)
+    ids_busca = indices.busca.buscar(termo)
+    if ids_busca:
+        df_filtrado = df_filtrado[df_filtrado['ID'].isin(ids_busca)]
+    else:
+        # Nada com essas palavras (ex.: erro de digitação): nomes parecidos, do mais parecido ao menos
+        ids_aproximados = indices.trigramas.buscar(termo)
+        busca_aproximada = bool(ids_aproximados)
+        df_filtrado = df_filtrado.set_index('ID').loc[ids_aproximados].reset_index()
 elif categoria_selecionada != "TODAS AS CATEGORIAS":
     # Filtra por categoria apenas se não houver busca
     df_filtrado = df_filtrado[df_filtrado['CATEGORIA'].astype(str) == categoria_selecionada]
@@ -670,6 +688,8 @@ if df_filtrado.empty:
     st.info(f"Nenhum produto encontrado com os critérios selecionados.")
 else:
     st.subheader("✨ Nossos Produtos")
+    if busca_aproximada:
+        st.caption(f"Nenhum produto com \"{termo}\". Mostrando os nomes mais parecidos.")
     
     # Opções de Grade (produtos por linha)
     opcoes_grade = [4, 3, 2]
@@ -693,7 +713,7 @@ else:
         'Maior Preço': (['EM_PROMOCAO', 'PRECO_FINAL'], [False, False]),
         'Nome do Produto (A-Z)': (['EM_PROMOCAO', 'NOME'], [False, True])
     }
-    if ordem_selecionada in sort_map:
+    if ordem_selecionada in sort_map and not busca_aproximada:
         by_cols, ascending_order = sort_map[ordem_selecionada]
         df_filtrado = df_filtrado.sort_values(by=by_cols, ascending=ascending_order)
 
@@ -0,0 +1,339 @@
+# catalogo_indices.py
+
+import ast
+import time
+
+import numpy as np
+import pandas as pd
+
+import busca_produtos
+
+# "Quem viu, viu também": quantos candidatos guardar por produto e de quanto em
+# quanto tempo (segundos) a seleção exibida muda
+CANDIDATOS_RELACIONADOS = 12
+PERIODO_ROTACAO_RELACIONADOS = 3600
+
+
+def ler_detalhes_grade(valor):
+    """
+    Interpreta o DETALHESGRADE de um produto (dict em texto, ex.: "{'Cor': 'Branco', 'Numeração': 37}").
+
+    Retorna {atributo: valor} com tudo como texto (é assim que a página compara as
+    opções), {} para produto sem grade (vazio, NaN, '{}') e None se o texto não for
+    um dict válido.
+    """
+    if pd.isna(valor):
+        return {}
+    texto = str(valor).strip()
+    if texto in ('', 'nan', '{}'):
+        return {}
+    try:
+        detalhes = ast.literal_eval(texto)
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+        return None
+    if not isinstance(detalhes, dict):
+        return None
+    return {str(atributo): str(opcao) for atributo, opcao in detalhes.items()}
+
+
+class MatrizVariacoes:
+    """
+    Opções de grade de uma família (pai + variações), para o seletor da página de
+    detalhes funcionar só com consultas a dicionários.
+
+    variantes: IDs da família que têm grade, na ordem da família (o pai primeiro)
+    atributos: atributos da grade em ordem alfabética (ex.: ['Cor', 'Numeração'])
+    opcoes:    {atributo: {opção: IDs das variantes com essa opção}}
+    estoque:   {ID: QUANTIDADE}
+    preco:     {ID: PRECO_FINAL}
+    """
+
+    def __init__(self, variantes, grades, estoque, preco):
+        self.variantes = list(variantes)
+        self.opcoes = {}
+        for produto_id in self.variantes:
+            for atributo, opcao in grades[produto_id].items():
+                self.opcoes.setdefault(atributo, {}).setdefault(opcao, []).append(produto_id)
+        self.atributos = sorted(self.opcoes)
+        self._opcoes_ordenadas = {atributo: sorted(opcoes) for atributo, opcoes in self.opcoes.items()}
+        self._conjuntos = {
+            atributo: {opcao: frozenset(ids) for opcao, ids in opcoes.items()}
+            for atributo, opcoes in self.opcoes.items()
+        }
+        self.estoque = estoque
+        self.preco = preco
+
+    def opcoes_validas(self, atributo, candidatos):
+        """Opções de 'atributo' (em ordem alfabética) que existem em alguma das variantes candidatas."""
+        ordenadas = self._opcoes_ordenadas.get(atributo, [])
+        if len(candidatos) == len(self.variantes):
+            return list(ordenadas)  # Nenhuma escolha feita ainda: todas valem
+        candidatos = set(candidatos)
+        return [opcao for opcao in ordenadas if not candidatos.isdisjoint(self._conjuntos[atributo][opcao])]
+
+    def filtrar(self, candidatos, atributo, opcao):
+        """As candidatas que têm 'opcao' no 'atributo', mantendo a ordem."""
+        com_opcao = self._conjuntos.get(atributo, {}).get(opcao, frozenset())
+        return [produto_id for produto_id in candidatos if produto_id in com_opcao]
+
+
+class GaleriaProduto:
+    """
+    Imagens de uma família para o carrossel da página de detalhes, montadas uma vez:
+    a foto do pai (legenda: categoria) e depois as das variações (legenda: grade),
+    sem URLs repetidas. Na hora de exibir só muda a primeira imagem (a do produto selecionado).
+    """
+
+    def __init__(self, itens, itens_por_produto):
+        self._itens = itens                          # [{'title', 'text', 'img'}]
+        self._itens_por_produto = itens_por_produto  # ID -> item como imagem selecionada
+
+    def itens(self, produto_selecionado=None):
+        """Itens do carrossel começando pela imagem de 'produto_selecionado' (se tiver foto)."""
+        primeiro = self._itens_por_produto.get(produto_selecionado)
+        if primeiro is None:
+            return list(self._itens)
+        return [primeiro] + [item for item in self._itens if item['img'] != primeiro['img']]
+
+
+class IndicesCatalogo:
+    """
+    Estruturas derivadas do catálogo publicado, montadas uma vez a cada publicação
+    (fora das requisições), para a página de detalhes não reprocessar o DataFrame
+    a cada rerun. São só leitura, como o próprio catálogo.
+
+    grades:              {ID: {atributo: opção}} dos produtos com grade
+    grades_invalidas:    IDs cujo DETALHESGRADE não pôde ser lido (tratados como sem grade)
+    produtos_principais: só os produtos sem PAIID (a vitrine), com 'ID' como coluna
+    categorias:          categorias dos produtos principais, em ordem alfabética
+    busca:               IndiceBusca dos produtos principais (barra de busca)
+    trigramas:           IndiceTrigramas dos nomes (busca aproximada e sugestões)
+    matriz_variacoes(ID) -> MatrizVariacoes da família (pré-calculada para os pais)
+    galeria(ID)          -> GaleriaProduto da família (pré-calculada para os pais)
+    relacionados(ID)     -> produtos para o "Quem viu, viu também" (candidatos pré-calculados)
+    """
+
+    def __init__(self, df_catalogo):
+        self.catalogo = df_catalogo
+        self.grades = {}
+        self.grades_invalidas = []
+        self._matrizes = {}
+        self._galerias = {}
+        self._colunas = {}  # coluna -> valores (numpy), para montar as matrizes por posição
+        self._indexar_grades(df_catalogo)
+        self._indexar_variacoes(df_catalogo)
+        self._indexar_relacionados(df_catalogo)
+        self.busca = busca_produtos.IndiceBusca(self.produtos_principais)
+        self.trigramas = busca_produtos.IndiceTrigramas(self.produtos_principais)
+        for pai_id in self._filhos:
+            self.matriz_variacoes(pai_id)
+            self.galeria(pai_id)
+
+    def _indexar_grades(self, df):
+        if 'DETALHESGRADE' not in df.columns:
+            return
+        lidos = {}  # O mesmo texto aparece em vários produtos: lê cada um uma vez
+        for produto_id, valor in zip(df.index, df['DETALHESGRADE']):
+            if pd.isna(valor):
+                continue
+            if valor not in lidos:
+                lidos[valor] = ler_detalhes_grade(valor)
+            detalhes = lidos[valor]
+            if detalhes is None:
+                self.grades_invalidas.append(produto_id)
+            elif detalhes:
+                self.grades[produto_id] = detalhes
+
+    def _indexar_variacoes(self, df):
+        """
+        Guarda as posições (iloc) das linhas por ID e dos filhos de cada pai, para a página
+        de detalhes buscar as variações sem comparar a coluna PAIID inteira.
+        """
+        self._posicao = {}  # ID -> posição da primeira linha com esse ID
+        for posicao, produto_id in enumerate(df.index):
+            self._posicao.setdefault(produto_id, posicao)
+
+        self._filhos = {}  # ID do pai -> posições dos filhos, na ordem do catálogo
+        if 'PAIID' in df.columns:
+            pais = df['PAIID']
+            com_pai = np.flatnonzero(pais.notna().to_numpy())
+            for posicao, pai_id in zip(com_pai, pais.iloc[com_pai]):
+                self._filhos.setdefault(pai_id, []).append(posicao)
+            principais = df[pais.isna()]
+        else:
+            principais = df
+
+        self.produtos_principais = principais.reset_index()
+        if 'CATEGORIA' in principais.columns:
+            self.categorias = sorted(principais['CATEGORIA'].dropna().astype(str).unique().tolist())
+        else:
+            self.categorias = []
+
+    def _indexar_relacionados(self, df):
+        """
+        Candidatos do "Quem viu, viu também" de cada produto principal: os próximos
+        produtos principais da mesma categoria, na ordem do catálogo (dando a volta no
+        fim da lista), até CANDIDATOS_RELACIONADOS. Sem outro produto na categoria, a
+        página usa a lista reserva (os primeiros produtos principais do catálogo).
+        """
+        if 'PAIID' in df.columns:
+            principais = np.flatnonzero(df['PAIID'].isna().to_numpy())
+        else:
+            principais = np.arange(len(df))
+
+        self._por_categoria = {}  # categoria -> posições dos produtos principais
+        if 'CATEGORIA' in df.columns:
+            for posicao, categoria in zip(principais, df['CATEGORIA'].iloc[principais]):
+                if pd.notna(categoria):
+                    self._por_categoria.setdefault(categoria, []).append(int(posicao))
+
+        self._relacionados = {}  # posição do produto principal -> posições dos candidatos
+        for posicoes in self._por_categoria.values():
+            total = len(posicoes)
+            quantidade = min(CANDIDATOS_RELACIONADOS, total - 1)
+            for indice, posicao in enumerate(posicoes):
+                self._relacionados[posicao] = [posicoes[(indice + passo) % total] for passo in range(1, quantidade + 1)]
+        self._relacionados_reserva = [int(p) for p in principais[:CANDIDATOS_RELACIONADOS + 1]]
+
+    def grade(self, produto_id):
+        """{atributo: opção} do produto ({} se não tiver grade ou não estiver no catálogo)."""
+        return self.grades.get(produto_id, {})
+
+    def variacoes(self, pai_id):
+        """Linhas cujo PAIID é 'pai_id', na ordem do catálogo (DataFrame vazio se não houver)."""
+        return self.catalogo.iloc[self._filhos.get(pai_id, [])]
+
+    def produto(self, produto_id):
+        """Linha do produto (a primeira, se o ID estiver repetido no catálogo)."""
+        return self.catalogo.iloc[self._posicao[produto_id]]
+
+    def produtos(self, produto_ids):
+        """Linhas dos IDs que estão no catálogo, na ordem pedida, com 'ID' como coluna."""
+        posicoes = [self._posicao[produto_id] for produto_id in produto_ids if produto_id in self._posicao]
+        return self.catalogo.iloc[posicoes].reset_index()
+
+    def principais(self, produto_ids):
+        """
+        Troca cada variação pelo seu produto pai (se o pai estiver no catálogo) e tira os
+        repetidos, mantendo a ordem: 'Batom Rosa' e 'Batom Nude' viram um só 'Batom'.
+        """
+        posicoes = [self._posicao[produto_id] for produto_id in produto_ids if produto_id in self._posicao]
+        ids = list(self.catalogo.index[posicoes])
+        pais = self._valores_coluna('PAIID', ids, posicoes)
+        resultado = []
+        for produto_id in ids:
+            pai_id = pais.get(produto_id)
+            if pd.notna(pai_id) and pai_id in self._posicao:
+                produto_id = self.catalogo.index[self._posicao[pai_id]]
+            if produto_id not in resultado:
+                resultado.append(produto_id)
+        return resultado
+
+    def _posicoes_familia(self, pai_id):
+        posicoes = [self._posicao[pai_id]] if pai_id in self._posicao else []
+        vistos = set(self.catalogo.index[posicoes])
+        for posicao in self._filhos.get(pai_id, []):
+            produto_id = self.catalogo.index[posicao]
+            if produto_id not in vistos:
+                vistos.add(produto_id)
+                posicoes.append(posicao)
+        return posicoes
+
+    def familia(self, pai_id):
+        """O produto 'pai_id' seguido das suas variações, sem IDs repetidos."""
+        return self.catalogo.iloc[self._posicoes_familia(pai_id)]
+
+    def matriz_variacoes(self, pai_id):
+        """
+        MatrizVariacoes da família de 'pai_id' (só os membros com grade). Calculada na
+        montagem para todos os pais; para os demais IDs, na primeira consulta.
+        """
+        matriz = self._matrizes.get(pai_id)
+        if matriz is None:
+            posicoes = [p for p in self._posicoes_familia(pai_id) if self.catalogo.index[p] in self.grades]
+            ids = list(self.catalogo.index[posicoes])
+            matriz = MatrizVariacoes(
+                ids, self.grades,
+                estoque=self._valores_coluna('QUANTIDADE', ids, posicoes),
+                preco=self._valores_coluna('PRECO_FINAL', ids, posicoes),
+            )
+            self._matrizes[pai_id] = matriz
+        return matriz
+
+    def galeria(self, pai_id):
+        """
+        GaleriaProduto da família de 'pai_id'. Calculada na montagem para todos os pais;
+        para os demais IDs, na primeira consulta.
+        """
+        galeria = self._galerias.get(pai_id)
+        if galeria is None:
+            posicoes = self._posicoes_familia(pai_id)
+            ids = list(self.catalogo.index[posicoes])
+            colunas = self.catalogo.columns
+            # Mesma prioridade da página: FOTOURL se existir, senão LINKIMAGEM
+            coluna_foto = 'FOTOURL' if 'FOTOURL' in colunas else 'LINKIMAGEM'
+            coluna_legenda_pai = 'CATEGORIA' if 'CATEGORIA' in colunas else 'MARCA'
+            fotos = self._valores_coluna(coluna_foto, ids, posicoes)
+            nomes = self._valores_coluna('NOME', ids, posicoes)
+
+            itens_por_produto = {}
+            for produto_id in ids:
+                foto = fotos.get(produto_id)
+                if pd.notna(foto):
+                    itens_por_produto[produto_id] = {
+                        "title": nomes.get(pai_id), "text": self._legenda(produto_id, nomes.get(produto_id)), "img": foto,
+                    }
+
+            itens, urls = [], set()
+            if ids and ids[0] == pai_id and pai_id in itens_por_produto:
+                legenda_pai = self._valores_coluna(coluna_legenda_pai, ids[:1], posicoes[:1]).get(pai_id, '')
+                itens.append({**itens_por_produto[pai_id], "text": legenda_pai})
+                urls.add(itens[0]["img"])
+            for produto_id in ids[1:]:
+                item = itens_por_produto.get(produto_id)
+                if item is not None and item["img"] not in urls:
+                    itens.append(item)
+                    urls.add(item["img"])
+            galeria = GaleriaProduto(itens, itens_por_produto)
+            self._galerias[pai_id] = galeria
+        return galeria
+
+    def relacionados(self, produto_id, quantidade=4, rodada=None):
+        """
+        Até 'quantidade' produtos principais para o "Quem viu, viu também" de 'produto_id'
+        (nunca ele mesmo nem suas variações), em DataFrame com 'ID' como coluna.
+
+        A escolha gira entre os candidatos a cada 'rodada' (por padrão, a cada
+        PERIODO_ROTACAO_RELACIONADOS segundos): a mesma rodada sempre mostra os mesmos
+        produtos, e o custo não depende do tamanho do catálogo.
+        """
+        if rodada is None:
+            rodada = int(time.time() // PERIODO_ROTACAO_RELACIONADOS)
+        posicao = self._posicao.get(produto_id)
+        candidatos = self._relacionados.get(posicao)
+        if candidatos is None and posicao is not None and 'CATEGORIA' in self.catalogo.columns:
+            # Não é produto principal (ex.: variação sem pai no catálogo): usa a categoria dela
+            categoria = self.catalogo['CATEGORIA'].iat[posicao]
+            mesma_categoria = self._por_categoria.get(categoria, []) if pd.notna(categoria) else []
+            candidatos = [p for p in mesma_categoria[:CANDIDATOS_RELACIONADOS + 1] if p != posicao]
+        if not candidatos:
+            candidatos = [p for p in self._relacionados_reserva if p != posicao][:CANDIDATOS_RELACIONADOS]
+
+        total = len(candidatos)
+        escolhidos = [candidatos[(rodada + passo) % total] for passo in range(min(quantidade, total))]
+        return self.catalogo.iloc[escolhidos].reset_index()
+
+    def _legenda(self, produto_id, nome):
+        """Legenda da imagem de uma variação: a grade ('Cor: Branco, Numeração: 37') ou o nome."""
+        detalhes = self.grade(produto_id)
+        if detalhes:
+            return ", ".join([f"{k}: {v}" for k, v in detalhes.items()])
+        return nome
+
+    def _valores_coluna(self, coluna, ids, posicoes):
+        if coluna not in self._colunas:
+            if coluna not in self.catalogo.columns:
+                return {}
+            self._colunas[coluna] = self.catalogo[coluna].to_numpy()
+        valores = self._colunas[coluna]
+        return {produto_id: valores[posicao] for produto_id, posicao in zip(ids, posicoes)}
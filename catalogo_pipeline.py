@@ -0,0 +1,64 @@
+# catalogo_pipeline.py
+
+import contextlib
+import threading
+import time
+
+
+class ConstrutorIncremental:
+    """
+    Grafo de etapas da montagem do catálogo.
+
+    Cada etapa fica guardada com a chave das suas entradas (ex.: SHA do arquivo de
+    origem + chaves das etapas anteriores). Se a chave não mudou, o resultado
+    anterior é reaproveitado; assim, mudar só 'promocoes.csv' refaz apenas o merge
+    de preços, sem reler nem normalizar 'produtos_estoque.csv'.
+
+    Os resultados guardados são compartilhados: quem usa uma etapa não pode
+    alterá-la no lugar (as etapas seguintes devem trabalhar em cópias).
+    """
+
+    def __init__(self):
+        self._etapas = {}  # nome -> (chave, resultado)
+        self._lock = threading.Lock()
+        self.ultimas_recalculadas = []
+        self.tempos = {}  # nome -> segundos da última vez que a etapa foi recalculada
+
+    def etapa(self, nome, chave, funcao):
+        """Retorna o resultado da etapa 'nome', recalculando só se 'chave' mudou."""
+        with self._lock:
+            guardada = self._etapas.get(nome)
+        if guardada is not None and guardada[0] == chave:
+            return guardada[1]
+
+        inicio = time.perf_counter()
+        resultado = funcao()
+        with self._lock:
+            self._etapas[nome] = (chave, resultado)
+            self.ultimas_recalculadas.append(nome)
+            self.tempos[nome] = time.perf_counter() - inicio
+        return resultado
+
+    def iniciar_rodada(self):
+        """Zera a lista de etapas recalculadas (usada para diagnóstico)."""
+        with self._lock:
+            self.ultimas_recalculadas = []
+
+    def limpar(self):
+        with self._lock:
+            self._etapas.clear()
+
+
+class Cronometro:
+    """Tempo (em segundos) de cada passo da última execução de uma etapa, para diagnóstico."""
+
+    def __init__(self):
+        self.tempos = {}
+
+    @contextlib.contextmanager
+    def medir(self, nome):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.tempos[nome] = time.perf_counter() - inicio
@@ -0,0 +1,126 @@
+# catalogo_refresher.py
+
+import threading
+import time
+
+
+class AtualizadorDados:
+    """
+    Atualiza os dados em segundo plano, fora do caminho das requisições dos usuários.
+
+    Cada arquivo tem seu próprio intervalo de verificação ('politicas', em segundos).
+    A cada ciclo, os arquivos vencidos são sincronizados; se algum mudou de versão,
+    'publicar(nomes_alterados)' monta a nova versão dos dados e a troca de uma vez
+    (quem está lendo continua com a versão antiga até a troca).
+
+    sincronizar(nome) -> versão do arquivo (str) ou None se indisponível
+    listar_versoes()  -> opcional: {nome: versão remota} de todos os arquivos em UMA
+                         chamada (ex.: árvore da branch). Quando informado, só são
+                         sincronizados os arquivos vencidos cuja versão remota mudou.
+    fator_intervalo() -> opcional: multiplica os intervalos das políticas (ex.: > 1
+                         quando o limite de requisições da API está acabando)
+    adiamentos        -> opcional: tipos de exceção que só adiam a verificação (ex.:
+                         limite da API reservado para as gravações). O arquivo vai para
+                         'adiados', não conta como erro, e é verificado no próximo intervalo
+    publicar(nomes)   -> monta e publica a nova versão (pode levantar exceção: a
+                         versão atual continua publicada e a troca é tentada de novo
+                         no próximo ciclo)
+    """
+
+    def __init__(self, politicas, sincronizar, publicar, listar_versoes=None, fator_intervalo=None, passo=1.0,
+                 adiamentos=()):
+        self.politicas = dict(politicas)
+        self._sincronizar = sincronizar
+        self._publicar = publicar
+        self._listar_versoes = listar_versoes
+        self._fator_intervalo = fator_intervalo or (lambda: 1.0)
+        self._passo = passo
+        self._adiamentos = tuple(adiamentos)
+        self._versoes = {}
+        self._proxima = {nome: 0.0 for nome in self.politicas}  # 0 = verificar já no 1º ciclo
+        self._pendentes = set()  # mudaram, mas a publicação falhou
+        self._parar = threading.Event()
+        self._acordar = threading.Event()
+        self._thread = None
+        self.ultimo_erro = None
+        self.adiados = set()  # Verificação adiada (não falhou): continuam com a versão publicada
+
+    def registrar_versoes(self, versoes):
+        """Informa as versões já publicadas (ex.: do snapshot), para não republicar sem mudança."""
+        self._versoes.update(versoes)
+
+    def iniciar(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._loop, name="atualizador_dados", daemon=True)
+            self._thread.start()
+
+    def parar(self, timeout=None):
+        self._parar.set()
+        self._acordar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def verificar_agora(self, nomes=None):
+        """Antecipa a verificação dos arquivos (todos, se 'nomes' for None)."""
+        for nome in (nomes or self.politicas):
+            self._proxima[nome] = 0.0
+        self._acordar.set()
+
+    def _loop(self):
+        while not self._parar.is_set():
+            self.executar_ciclo()
+            self._acordar.wait(self._passo)
+            self._acordar.clear()
+
+    def executar_ciclo(self, agora=None):
+        """Verifica os arquivos vencidos e publica uma nova versão se algo mudou."""
+        agora = time.monotonic() if agora is None else agora
+        vencidos = [nome for nome, quando in self._proxima.items() if agora >= quando]
+        if not vencidos and not self._pendentes:
+            return []
+
+        fator = self._fator_intervalo()
+        remotas = None
+        if vencidos and self._listar_versoes is not None:
+            try:
+                remotas = self._listar_versoes()
+            except self._adiamentos:
+                # Sem orçamento nem para a listagem: nenhum arquivo é verificado neste ciclo
+                self.adiados.update(vencidos)
+                for nome in vencidos:
+                    self._proxima[nome] = agora + self.politicas[nome] * fator
+                vencidos = []
+            except Exception as e:
+                self.ultimo_erro = e  # Sem a listagem, verifica arquivo por arquivo
+
+        alterados = set(self._pendentes)
+        for nome in vencidos:
+            if remotas is not None and remotas.get(nome) == self._versoes.get(nome, False):
+                # Versão remota igual à publicada: nenhuma chamada para este arquivo
+                self.adiados.discard(nome)
+                self._proxima[nome] = agora + self.politicas[nome] * fator
+                continue
+            try:
+                versao = self._sincronizar(nome)
+                self.adiados.discard(nome)
+            except self._adiamentos:
+                self.adiados.add(nome)
+                versao = self._versoes.get(nome)
+            except Exception as e:
+                self.ultimo_erro = e
+                versao = self._versoes.get(nome)  # Falhou: mantém o que já está publicado
+            if versao != self._versoes.get(nome):
+                alterados.add(nome)
+                self._versoes[nome] = versao
+            self._proxima[nome] = agora + self.politicas[nome] * fator
+
+        if not alterados:
+            return []
+        try:
+            self._publicar(sorted(alterados))
+            self._pendentes.clear()
+        except Exception as e:
+            self.ultimo_erro = e
+            self._pendentes = alterados
+        return sorted(alterados)
@@ -0,0 +1,103 @@
+# catalogo_snapshot.py
+
+import glob
+import hashlib
+import json
+import os
+import tempfile
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (só para saber se dá para gravar Parquet)
+    PARQUET_DISPONIVEL = True
+except ImportError:
+    PARQUET_DISPONIVEL = False
+
+
+# Aumente sempre que a montagem do catálogo mudar: snapshots de versões antigas
+# do código deixam de ser usados (a chave inclui este número).
+VERSAO_FORMATO = 2
+
+NOME_PONTEIRO = "catalogo_atual.json"
+SNAPSHOTS_MANTIDOS = 2
+
+
+def chave_snapshot(versoes_fontes):
+    """
+    Gera a chave do snapshot a partir das versões (SHA/ETag) dos arquivos de origem.
+    {'produtos_estoque.csv': 'abc..', 'promocoes.csv': None, ...} -> 'v1-3f2a...'
+    """
+    texto = json.dumps(versoes_fontes, sort_keys=True)
+    return f"v{VERSAO_FORMATO}-" + hashlib.sha1(texto.encode("utf-8")).hexdigest()[:16]
+
+
+def _gravar_ponteiro(pasta, dados):
+    fd, tmp = tempfile.mkstemp(dir=pasta, prefix=".tmp_")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(dados, f)
+    os.replace(tmp, os.path.join(pasta, NOME_PONTEIRO))
+
+
+def salvar_snapshot(df, chave, pasta):
+    """
+    Grava o catálogo final (colunar, Parquet quando o pyarrow existir; senão pickle)
+    e troca o ponteiro 'catalogo_atual.json' de forma atômica.
+    """
+    os.makedirs(pasta, exist_ok=True)
+    # O índice vai como coluna comum: assim o Parquet preserva o dtype (ex.: Int64 do 'ID')
+    indice = df.index.name
+    df = df.reset_index()
+    caminho = None
+    if PARQUET_DISPONIVEL:
+        caminho = os.path.join(pasta, f"catalogo_{chave}.parquet")
+        try:
+            df.to_parquet(caminho + ".tmp", index=False)
+            os.replace(caminho + ".tmp", caminho)
+        except Exception:
+            # Colunas com tipos misturados podem não caber no Parquet: usa pickle
+            if os.path.exists(caminho + ".tmp"):
+                os.remove(caminho + ".tmp")
+            caminho = None
+    if caminho is None:
+        caminho = os.path.join(pasta, f"catalogo_{chave}.pkl")
+        df.to_pickle(caminho + ".tmp")
+        os.replace(caminho + ".tmp", caminho)
+
+    _gravar_ponteiro(pasta, {"chave": chave, "arquivo": os.path.basename(caminho), "indice": indice})
+    _limpar_antigos(pasta, manter=caminho)
+    return caminho
+
+
+def _limpar_antigos(pasta, manter):
+    arquivos = sorted(glob.glob(os.path.join(pasta, "catalogo_v*")), key=os.path.getmtime, reverse=True)
+    antigos = [a for a in arquivos if a != manter][SNAPSHOTS_MANTIDOS - 1:]
+    for arquivo in antigos:
+        try:
+            os.remove(arquivo)
+        except OSError:
+            pass
+
+
+def carregar_snapshot(pasta):
+    """
+    Lê o snapshot atual. Retorna (chave, df) ou (None, None) se não houver snapshot
+    utilizável (inexistente, corrompido ou gerado por outra VERSAO_FORMATO).
+    """
+    try:
+        with open(os.path.join(pasta, NOME_PONTEIRO), encoding="utf-8") as f:
+            ponteiro = json.load(f)
+        chave = ponteiro["chave"]
+        if not chave.startswith(f"v{VERSAO_FORMATO}-"):
+            return None, None
+        caminho = os.path.join(pasta, ponteiro["arquivo"])
+        if caminho.endswith(".parquet"):
+            df = pd.read_parquet(caminho)
+        else:
+            df = pd.read_pickle(caminho)
+        if ponteiro.get("indice"):
+            df = df.set_index(ponteiro["indice"])
+        return chave, df
+    except Exception:
+        # Snapshot ausente ou ilegível nunca pode impedir a carga normal do catálogo
+        return None, None
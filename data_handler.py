@@ -1,16 +1,31 @@
 # data_handler.py
 
 import os
+import atexit
 import requests
-import base64
-from io import StringIO
 import pandas as pd
+import numpy as np
 from datetime import datetime
 import json
 import pytz
 import streamlit as st 
 import re
-
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+import data_backends
+import github_client
+import data_schemas
+import disjuntor
+import catalogo_snapshot
+import catalogo_pipeline
+import catalogo_indices
+import catalogo_refresher
+import recomendacoes
+
+
+_log = logging.getLogger(__name__)
 
 # --- Variáveis de Configuração ---
 GITHUB_TOKEN = os.environ.get("GITHUB_TOKEN")
@@ -21,6 +36,9 @@ ESTOQUE_BAIXO_LIMITE = 2
 # URLs da API
 GITHUB_BASE_API = f"https://api.github.com/repos/{DATA_REPO_NAME}/contents/"
 
+# Onde os dados ficam (GitHub, pasta local ou SQLite): ver DATA_BACKEND em data_backends.py
+BACKEND = data_backends.criar_backend(DATA_REPO_NAME, BRANCH, GITHUB_TOKEN)
+
 # Fontes de Dados (CSV no GitHub)
 SHEET_NAME_CATALOGO_CSV = "produtos_estoque.csv"
 SHEET_NAME_PROMOCOES_CSV = "promocoes.csv"
@@ -34,90 +52,188 @@ LOGO_DOCEBELLA_URL = "https://i.ibb.co/sdMgFXmT/logo_docebella.png"
 # NÚMERO DE TELEFONE PARA O BOTÃO FLUTUANTE DO WHATSAPP
 NUMERO_WHATSAPP = "5541987876191" 
 
+# Atualização em segundo plano: intervalo (em segundos) entre as verificações de cada arquivo.
+# Os usuários sempre leem a última versão publicada; nenhum rerun espera pelo GitHub.
+POLITICAS_ATUALIZACAO = {
+    SHEET_NAME_PROMOCOES_CSV: int(os.environ.get("ATUALIZAR_PROMOCOES_SEG", "60")),
+    SHEET_NAME_CATALOGO_CSV: int(os.environ.get("ATUALIZAR_CATALOGO_SEG", "300")),
+    SHEET_NAME_VIDEOS_CSV: int(os.environ.get("ATUALIZAR_VIDEOS_SEG", "300")),
+    SHEET_NAME_CUPONS_CSV: int(os.environ.get("ATUALIZAR_CUPONS_SEG", "120")),
+    SHEET_NAME_CLIENTES_CASHBACK_CSV: int(os.environ.get("ATUALIZAR_CASHBACK_SEG", "120")),
+    SHEET_NAME_PEDIDOS_CSV: int(os.environ.get("ATUALIZAR_PEDIDOS_SEG", "300")),
+}
 
-# --- Funções de Conexão GITHUB ---
-def get_data_from_github(file_name):
+
+# --- Acesso aos arquivos (via BACKEND) ---
+def versao_arquivo(file_name):
+    """Versão da cópia local do arquivo (SHA do blob no GitHub), ou None se não houver cópia."""
+    return BACKEND.versao(file_name)
+
+
+def _ao_recuperar_fonte():
+    """A fonte voltou (sonda do disjuntor funcionou): verifica todos os arquivos já."""
+    if _atualizador is not None:
+        _atualizador.verificar_agora()
+
+
+# Circuit breaker da fonte de dados: após falhas seguidas, as sincronizações falham na
+# hora e os dados continuam vindo da última cópia boa em disco, até a sonda ver a fonte de volta.
+_disjuntor = disjuntor.Disjuntor(sonda=lambda: BACKEND.listar_versoes(), ao_recuperar=_ao_recuperar_fonte)
+_desatualizados = {}  # arquivo -> desde quando está sendo servido da última cópia boa
+
+
+def arquivos_desatualizados():
     """
-    Lê o conteúdo de um CSV do GitHub diretamente via API (sem cache da CDN).
-    Garante que sempre trará a versão mais recente do arquivo.
+    {arquivo: datetime} dos arquivos cuja última sincronização falhou (servidos da cópia
+    anterior). Verificações só adiadas para economizar o limite da API não entram: ver
+    arquivos_adiados().
     """
-    api_url = f"{GITHUB_BASE_API}{file_name}?ref={BRANCH}"
+    return dict(_desatualizados)
+
 
+def arquivos_adiados():
+    """Arquivos cuja última verificação foi adiada (limite da API reservado para os pedidos)."""
+    return set(_atualizador.adiados) if _atualizador is not None else set()
+
+
+def _sincronizar_arquivo(file_name):
+    """Atualiza a cópia local do arquivo e retorna a referência local (None se não existir)."""
     try:
-        headers_content = {
-            "Authorization": f"token {GITHUB_TOKEN}",
-        }
-        response = requests.get(api_url, headers=headers_content)
+        caminho = _disjuntor.chamar(BACKEND.sincronizar, file_name)
+    except github_client.OrcamentoReservado:
+        raise  # Não tentou: a cópia local não ficou "mais velha" por falha da fonte
+    except Exception:
+        _desatualizados.setdefault(file_name, datetime.now())
+        raise
+    _desatualizados.pop(file_name, None)
+    return caminho
 
-        if response.status_code == 404:
-            if file_name != SHEET_NAME_CUPONS_CSV:
-                st.error(f"Erro 404: Arquivo '{file_name}' não encontrado no repositório '{DATA_REPO_NAME}' na branch '{BRANCH}'. Verifique o nome do arquivo/branch/repo.")
-            return None
 
-        response.raise_for_status()
+def listar_versoes_remotas():
+    """{arquivo: versão} de todos os arquivos numa única consulta (None se o backend não listar)."""
+    versoes = _disjuntor.chamar(BACKEND.listar_versoes)
+    if versoes is not None:
+        # A cópia local que era a "última boa" e continua igual à remota já está em dia
+        for nome in list(_desatualizados):
+            if versoes.get(nome) == versao_arquivo(nome):
+                _desatualizados.pop(nome, None)
+    return versoes
 
-        try:
-            data = response.json()
-        except requests.exceptions.JSONDecodeError:
-            st.error(f"Erro de JSON ao decodificar a resposta da API do GitHub para '{file_name}'.")
-            st.code(response.text[:500])
-            return None
 
-        if "content" not in data:
-            st.error(f"O campo 'content' não foi encontrado na resposta da API. Verifique se o arquivo {file_name} existe na branch '{BRANCH}'.")
-            st.json(data)
-            return None
+def _obter_caminho_local(file_name):
+    """
+    Sincroniza o arquivo (ver _sincronizar_arquivo) e retorna a referência da cópia local.
+    Se a fonte falhar, usa a última cópia boa (marcada em arquivos_desatualizados);
+    sem cópia nenhuma, retorna None (a mensagem é exibida na página).
+    """
+    try:
+        caminho = _sincronizar_arquivo(file_name)
 
-        content = base64.b64decode(data["content"]).decode("utf-8")
-        csv_data = StringIO(content)
-        
-        # --- NOVO TRECHO COM A CORREÇÃO DE DTYPE ---
-        # Parâmetros de leitura padrão
-        read_params = {
-            "sep": ",",
-            "encoding": "utf-8",
-            "engine": "python",
-            "on_bad_lines": "warn"
-        }
-        
-        # Se for o arquivo de cashback, força as colunas de contato a serem string
-        if file_name == SHEET_NAME_CLIENTES_CASHBACK_CSV:
-            read_params['dtype'] = {'CONTATO': str, 'CONTATO_LIMPO': str}
-            
-        df = pd.read_csv(csv_data, **read_params)
-        # --- FIM DO NOVO TRECHO ---
+        if caminho is None:
+            if file_name != SHEET_NAME_CUPONS_CSV:
+                _avisar(f"Erro 404: Arquivo '{file_name}' não encontrado {BACKEND.descricao}. Verifique o nome do arquivo/branch/repo.", "error")
+            return None
 
-        df.columns = [col.strip().upper().replace(' ', '_') for col in df.columns]
-        return df
+        return caminho
 
     except requests.exceptions.HTTPError as e:
-        if e.response.status_code != 404:
-            st.error(f"Erro HTTP ao acessar '{file_name}' via API ({e.response.status_code}). URL: {api_url}")
+        ultima_copia = _caminho_sincronizado(file_name)
+        if ultima_copia is None and e.response.status_code != 404:
+            _avisar(f"Erro HTTP ao acessar '{file_name}' {BACKEND.descricao} ({e.response.status_code}).", "error")
+        return ultima_copia
+    except Exception as e:
+        ultima_copia = _caminho_sincronizado(file_name)
+        if ultima_copia is None:
+            _avisar(f"Erro ao carregar '{file_name}' {BACKEND.descricao}: {e}", "error")
+        return ultima_copia
+
+
+def _ler_arquivo_local(file_name, caminho):
+    """Lê a cópia local já sincronizada (caminho None = arquivo indisponível)."""
+    if caminho is None:
         return None
+    try:
+        return BACKEND.ler(file_name, caminho)
     except Exception as e:
-        st.error(f"Erro ao carregar '{file_name}' via API do GitHub: {e}")
+        _avisar(f"Erro ao ler '{file_name}': {e}", "error")
         return None
 
 
-@st.cache_data(ttl=None)
+def get_data_from_github(file_name):
+    """
+    Lê o conteúdo de um CSV do GitHub diretamente via API (sem cache da CDN).
+    Garante que sempre trará a versão mais recente do arquivo.
+    Arquivos que não mudaram vêm do cache em disco (ver _sincronizar_arquivo);
+    o parser lê do arquivo local (sem base64, sem cópias extras em memória).
+    Com outro DATA_BACKEND, lê da pasta local ou do SQLite.
+    """
+    return _ler_arquivo_local(file_name, _obter_caminho_local(file_name))
+
+
+def _caminho_sincronizado(file_name):
+    """Referência da cópia local já sincronizada (sem acessar a rede), ou None se não houver."""
+    return BACKEND.local(file_name)
+
+
+def _avisar(mensagem, nivel="warning"):
+    """
+    st.warning/st.error quando chamado durante um rerun. Na thread do atualizador não
+    há página (o st.* seria descartado em silêncio), então o aviso vai para o log.
+    """
+    if get_script_run_ctx(suppress_warning=True) is not None:
+        getattr(st, nivel)(mensagem)
+    else:
+        _log.log(logging.ERROR if nivel == "error" else logging.WARNING, mensagem)
+
+
+def executar_em_paralelo(tarefas):
+    """
+    Executa as funções de 'tarefas' ({nome: função sem argumentos}) ao mesmo tempo
+    e retorna {nome: resultado}. Usado para baixar arquivos independentes em uma
+    única "ida e volta" em vez de uma requisição depois da outra.
+
+    As threads herdam o contexto do script Streamlit para que st.error/st.warning
+    continuem aparecendo na página.
+    """
+    if not tarefas:
+        return {}
+    ctx = get_script_run_ctx()
+
+    def com_contexto(funcao):
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        return funcao()
+
+    with ThreadPoolExecutor(max_workers=len(tarefas), thread_name_prefix="carga_dados") as executor:
+        futuros = {nome: executor.submit(com_contexto, funcao) for nome, funcao in tarefas.items()}
+        return {nome: futuro.result() for nome, futuro in futuros.items()}
+
+
 def carregar_cupons():
-    """Carrega os cupons do 'cupons.csv' do GitHub, validando com fuso horário do Brasil."""
-    df = get_data_from_github(SHEET_NAME_CUPONS_CSV)
-    
+    """
+    Cupons válidos da versão publicada do 'cupons.csv' (ver _dados_atuais).
+    A validade é conferida a cada chamada, com o fuso horário do Brasil.
+    """
+    return _preparar_cupons(_dados_atuais()['cupons'])
+
+
+def _preparar_cupons(df):
+    """Filtra os cupons ativos, dentro da validade e com usos disponíveis. Não altera o df recebido."""
     colunas_essenciais = ['CODIGO', 'TIPO_DESCONTO', 'VALOR', 'DATA_VALIDADE', 
                            'VALOR_MINIMO_PEDIDO', 'LIMITE_USOS', 'USOS_ATUAIS', 'STATUS']
                            
     if df is None or df.empty:
         return pd.DataFrame(columns=colunas_essenciais)
 
-    df.rename(columns={'CODIGO': 'NOME_CUPOM', 'VALOR': 'VALOR_DESCONTO'}, inplace=True)
     colunas_essenciais_renomeadas = ['NOME_CUPOM', 'TIPO_DESCONTO', 'VALOR_DESCONTO', 'DATA_VALIDADE', 
                                     'VALOR_MINIMO_PEDIDO', 'LIMITE_USOS', 'USOS_ATUAIS', 'STATUS']
 
-    for col in colunas_essenciais_renomeadas:
-        if col not in df.columns:
-            st.warning(f"A planilha de cupons existe, mas a coluna essencial '{col}' não foi encontrada.")
-            return pd.DataFrame(columns=colunas_essenciais_renomeadas)
+    faltando = data_schemas.colunas_faltando(df, SHEET_NAME_CUPONS_CSV)
+    if faltando:
+        _avisar(f"A planilha de cupons existe, mas a coluna essencial '{faltando[0]}' não foi encontrada.")
+        return pd.DataFrame(columns=colunas_essenciais_renomeadas)
+
+    df = df.rename(columns={'CODIGO': 'NOME_CUPOM', 'VALOR': 'VALOR_DESCONTO'})
 
     df_ativo = df[df['STATUS'].astype(str).str.strip().str.upper() == 'ATIVO'].copy()
     if df_ativo.empty:
@@ -125,15 +241,12 @@ def carregar_cupons():
 
     df_ativo['NOME_CUPOM'] = df_ativo['NOME_CUPOM'].astype(str).str.strip().str.upper()
     df_ativo['TIPO_DESCONTO'] = df_ativo['TIPO_DESCONTO'].astype(str).str.strip().str.upper()
-    df_ativo['VALOR_DESCONTO'] = pd.to_numeric(df_ativo['VALOR_DESCONTO'].astype(str).str.replace(',', '.'), errors='coerce')
-    df_ativo['VALOR_MINIMO_PEDIDO'] = pd.to_numeric(df_ativo['VALOR_MINIMO_PEDIDO'].astype(str).str.replace(',', '.'), errors='coerce').fillna(0)
-    df_ativo['LIMITE_USOS'] = pd.to_numeric(df_ativo['LIMITE_USOS'], errors='coerce').fillna(999999)
-    df_ativo['USOS_ATUAIS'] = pd.to_numeric(df_ativo['USOS_ATUAIS'], errors='coerce').fillna(0)
+    # Tipos numéricos e a data (formato dd/mm/aaaa, falhas viram NaT) já vêm do esquema do arquivo
+    df_ativo['VALOR_MINIMO_PEDIDO'] = df_ativo['VALOR_MINIMO_PEDIDO'].fillna(0)
+    df_ativo['LIMITE_USOS'] = df_ativo['LIMITE_USOS'].fillna(999999)
+    df_ativo['USOS_ATUAIS'] = df_ativo['USOS_ATUAIS'].fillna(0)
     
     # --- INÍCIO DA CORREÇÃO: Validação Segura da DATA_VALIDADE ---
-    
-    # Tenta converter a data para o formato datetime. Falhas viram NaT (Not a Time).
-    df_ativo['DATA_VALIDADE'] = pd.to_datetime(df_ativo['DATA_VALIDADE'], format='%d/%m/%Y', errors='coerce')
 
     # Define o fuso horário e a data atual
     tz_brasil = pytz.timezone('America/Sao_Paulo')
@@ -142,9 +255,10 @@ def carregar_cupons():
     # 1. Cria uma máscara para identificar quais linhas TÊM uma data válida (não são NaT).
     datas_validas_mask = df_ativo['DATA_VALIDADE'].notna()
 
-    # 2. Somente para as linhas com datas válidas, aplica o fuso horário.
+    # 2. Aplica o fuso horário na coluna inteira (NaT continua NaT; atribuir só nas linhas
+    #    válidas transformava a coluna em 'object' e quebrava o .dt abaixo).
     if datas_validas_mask.any():
-        df_ativo.loc[datas_validas_mask, 'DATA_VALIDADE'] = df_ativo.loc[datas_validas_mask, 'DATA_VALIDADE'].dt.tz_localize(tz_brasil)
+        df_ativo['DATA_VALIDADE'] = df_ativo['DATA_VALIDADE'].dt.tz_localize(tz_brasil)
 
         # 3. Cria uma máscara para identificar os cupons que estão expirados.
         # Um cupom é expirado SE ele tem uma data VÁLIDA E essa data é ANTERIOR a hoje.
@@ -162,74 +276,366 @@ def carregar_cupons():
     return df_ativo.dropna(subset=['NOME_CUPOM', 'VALOR_DESCONTO']).reset_index(drop=True)
 
 
-@st.cache_data(ttl=None)
-def carregar_promocoes():
-    """Carrega as promoções do 'promocoes.csv' do GitHub."""
-    df = get_data_from_github(SHEET_NAME_PROMOCOES_CSV)
-
+def _preparar_promocoes(df):
+    """Filtra as promoções ativas e mantém só as colunas usadas no catálogo."""
     colunas_essenciais = ['ID_PRODUTO', 'PRECO_PROMOCIONAL', 'STATUS']
     if df is None or df.empty:
         return pd.DataFrame(columns=colunas_essenciais)
 
-    for col in colunas_essenciais:
-        if col not in df.columns:
-            st.error(f"Coluna essencial '{col}' não encontrada no 'promocoes.csv'. Verifique o cabeçalho.")
-            return pd.DataFrame(columns=colunas_essenciais)
+    faltando = data_schemas.colunas_faltando(df, SHEET_NAME_PROMOCOES_CSV)
+    if faltando:
+        _avisar(f"Coluna essencial '{faltando[0]}' não encontrada no 'promocoes.csv'. Verifique o cabeçalho.", "error")
+        return pd.DataFrame(columns=colunas_essenciais)
 
+    # ID_PRODUTO (Int64) e PRECO_PROMOCIONAL (float) já vêm tipados pelo esquema
     df = df[df['STATUS'].astype(str).str.strip().str.upper() == 'ATIVO'].copy()
     df_essencial = df[colunas_essenciais].copy()
 
-    df_essencial['PRECO_PROMOCIONAL'] = pd.to_numeric(df_essencial['PRECO_PROMOCIONAL'].astype(str).str.replace(',', '.'), errors='coerce')
-    df_essencial['ID_PRODUTO'] = pd.to_numeric(df_essencial['ID_PRODUTO'], errors='coerce').astype('Int64')
-
     return df_essencial.dropna(subset=['ID_PRODUTO', 'PRECO_PROMOCIONAL']).reset_index(drop=True)
 
 
-@st.cache_data(ttl=None)
+FONTES_CATALOGO = [SHEET_NAME_CATALOGO_CSV, SHEET_NAME_PROMOCOES_CSV, SHEET_NAME_VIDEOS_CSV]
+
+# Etapas da montagem do catálogo guardadas por versão das entradas (ver _construir_catalogo)
+_construtor_catalogo = catalogo_pipeline.ConstrutorIncremental()
+
+# "Comprados juntos" a partir do histórico de pedidos, atualizado só com os pedidos novos
+_motor_recomendacoes = recomendacoes.MotorRecomendacoes()
+
+# Versão publicada dos dados: {'catalogo', 'indices', 'cupons', 'clientes_cash', 'recomendacoes'}.
+# É sempre trocada inteira (nunca alterada no lugar): quem já pegou a versão
+# anterior continua usando-a até o próximo rerun.
+_dados_publicados = None
+_lock_publicacao = threading.Lock()
+
+# Índices de versões anteriores do catálogo que sessões ainda podem estar usando
+# (id do DataFrame -> IndicesCatalogo; os índices guardam o DataFrame, então o id não é reaproveitado)
+MAX_INDICES_ANTERIORES = 2
+_indices_anteriores = {}
+_lock_indices = threading.RLock()
+_atualizador = None
+
+
+def _pasta_snapshots():
+    return os.path.join(BACKEND.pasta_cache(), "snapshots")
+
+
+def _chave_fontes_catalogo():
+    """Chave do snapshot: versões (ETag/SHA) locais dos arquivos que formam o catálogo."""
+    return catalogo_snapshot.chave_snapshot({nome: versao_arquivo(nome) for nome in FONTES_CATALOGO})
+
+
+def _gravar_snapshot(df_catalogo):
+    try:
+        catalogo_snapshot.salvar_snapshot(df_catalogo, _chave_fontes_catalogo(), _pasta_snapshots())
+    except Exception:
+        pass  # Snapshot é só otimização de partida
+
+
+def _indexar_catalogo(df_catalogo):
+    """Monta os índices do catálogo (ver catalogo_indices) junto com cada publicação."""
+    indices = catalogo_indices.IndicesCatalogo(df_catalogo)
+    if indices.grades_invalidas:
+        ids = ", ".join(str(produto_id) for produto_id in indices.grades_invalidas[:10])
+        _avisar(f"DETALHESGRADE inválido em {len(indices.grades_invalidas)} produto(s) "
+                   f"(ID: {ids}). Eles serão exibidos sem variações.")
+    return indices
+
+
+def _ler_publicavel(file_name, sincronizar):
+    """Lê um arquivo para publicação: baixando (1ª carga) ou só da cópia local já sincronizada."""
+    if sincronizar:
+        return get_data_from_github(file_name)
+    return _ler_arquivo_local(file_name, _caminho_sincronizado(file_name))
+
+
+def _sincronizar_versao(file_name):
+    """Usada pelo atualizador: sincroniza o arquivo e retorna a versão local (None se não existir)."""
+    return versao_arquivo(file_name) if _sincronizar_arquivo(file_name) else None
+
+
+def _publicar_alteracoes(alterados):
+    """
+    Chamada pelo atualizador (fora das requisições dos usuários) com os arquivos
+    que mudaram: monta a nova versão a partir das cópias locais e troca de uma vez.
+    Se o catálogo não puder ser montado, a versão anterior continua publicada.
+    """
+    global _dados_publicados
+    novo = dict(_dados_publicados)
+    if SHEET_NAME_CUPONS_CSV in alterados:
+        novo['cupons'] = _ler_publicavel(SHEET_NAME_CUPONS_CSV, sincronizar=False)
+    if SHEET_NAME_CLIENTES_CASHBACK_CSV in alterados:
+        novo['clientes_cash'] = _preparar_clientes_cashback(
+            _ler_publicavel(SHEET_NAME_CLIENTES_CASHBACK_CSV, sincronizar=False))
+    if SHEET_NAME_PEDIDOS_CSV in alterados:
+        novo['recomendacoes'] = _motor_recomendacoes.atualizar(
+            _ler_publicavel(SHEET_NAME_PEDIDOS_CSV, sincronizar=False))
+
+    erro_catalogo = None
+    if set(alterados) & set(FONTES_CATALOGO):
+        df_catalogo = _construir_catalogo(sincronizar=False)
+        if df_catalogo.empty:
+            erro_catalogo = RuntimeError("Catálogo vazio; mantendo a versão publicada.")
+        else:
+            novo['catalogo'] = df_catalogo
+            novo['indices'] = _indexar_catalogo(df_catalogo)
+            _guardar_indices_anteriores(_dados_publicados['indices'])
+            _gravar_snapshot(df_catalogo)
+
+    with _lock_publicacao:
+        _dados_publicados = novo
+    if erro_catalogo is not None:
+        raise erro_catalogo  # O atualizador tenta montar de novo no próximo ciclo
+
+
+def _publicar_versao_inicial():
+    """
+    Primeira carga do processo. O catálogo vem do snapshot em disco quando existe
+    (milissegundos); cupons e cashback vêm da cópia local, se houver. O que não
+    estiver em disco é baixado em paralelo. O atualizador revalida tudo em seguida,
+    em segundo plano.
+    """
+    global _dados_publicados, _atualizador
+    chave_snapshot, df_snapshot = catalogo_snapshot.carregar_snapshot(_pasta_snapshots())
+    tarefas = {}
+    if df_snapshot is None:
+        tarefas['catalogo'] = _construir_catalogo
+    for chave, nome in (('cupons', SHEET_NAME_CUPONS_CSV), ('clientes_cash', SHEET_NAME_CLIENTES_CASHBACK_CSV)):
+        local = _caminho_sincronizado(nome) is not None
+        tarefas[chave] = (lambda nome=nome, local=local: _ler_publicavel(nome, sincronizar=not local))
+    dados = executar_em_paralelo(tarefas)
+
+    if df_snapshot is not None:
+        dados['catalogo'] = df_snapshot
+    elif not dados['catalogo'].empty:
+        _gravar_snapshot(dados['catalogo'])
+    dados['indices'] = _indexar_catalogo(dados['catalogo'])
+    dados['clientes_cash'] = _preparar_clientes_cashback(dados['clientes_cash'])
+    # Pedidos não atrasam a partida: o primeiro ciclo do atualizador lê o histórico
+    dados['recomendacoes'] = _motor_recomendacoes.resultado
+
+    # Versões já publicadas: o atualizador só remonta o que mudar a partir daqui
+    versoes = {nome: versao_arquivo(nome) for nome in (SHEET_NAME_CUPONS_CSV, SHEET_NAME_CLIENTES_CASHBACK_CSV)}
+    if df_snapshot is None or chave_snapshot == _chave_fontes_catalogo():
+        versoes.update({nome: versao_arquivo(nome) for nome in FONTES_CATALOGO})
+    if dados['catalogo'].empty:
+        # Sem catálogo publicado: tenta montar de novo logo no primeiro ciclo
+        versoes = {nome: v for nome, v in versoes.items() if nome not in FONTES_CATALOGO}
+
+    _dados_publicados = dados
+    _atualizador = catalogo_refresher.AtualizadorDados(
+        POLITICAS_ATUALIZACAO, _sincronizar_versao, _publicar_alteracoes,
+        listar_versoes=listar_versoes_remotas,  # Uma chamada por ciclo, não uma por arquivo
+        fator_intervalo=github_client.fator_economia,  # Limite da API acabando: verifica menos
+        adiamentos=(github_client.OrcamentoReservado,),  # Economia do limite, não falha da fonte
+    )
+    _atualizador.registrar_versoes(versoes)
+    _atualizador.iniciar()
+
+
+def _dados_atuais():
+    """Retorna a versão publicada dos dados (a primeira chamada do processo faz a carga inicial)."""
+    if _dados_publicados is None:
+        with _lock_publicacao:
+            if _dados_publicados is None:
+                _publicar_versao_inicial()
+    return _dados_publicados
+
+
+@atexit.register
+def _parar_atualizador():
+    """No desligamento, espera o ciclo em andamento terminar (thread parada no meio do pandas/pyarrow pode travar a saída)."""
+    if _atualizador is not None:
+        _atualizador.parar(timeout=10)
+    _disjuntor.parar()
+    BACKEND.finalizar()  # Ex.: modo "git" envia os commits que ainda não foram enviados
+
+
 def carregar_catalogo():
+    """
+    Retorna o catálogo pronto (ver _construir_catalogo), com 'ID' como índice.
+
+    É a versão publicada pelo atualizador em segundo plano: a chamada não acessa
+    o GitHub (exceto na primeira carga do processo, ver _publicar_versao_inicial).
+    O DataFrame é compartilhado entre as sessões e não deve ser alterado no lugar.
+    """
+    return _dados_atuais()['catalogo']
+
+
+def _guardar_indices_anteriores(indices):
+    """Mantém os índices da versão que está saindo, para as sessões que ainda usam aquele catálogo."""
+    with _lock_indices:
+        _indices_anteriores[id(indices.catalogo)] = indices
+        while len(_indices_anteriores) > MAX_INDICES_ANTERIORES:
+            del _indices_anteriores[next(iter(_indices_anteriores))]  # O mais antigo
+
+
+def indices_catalogo(df_catalogo=None):
+    """
+    Índices do catálogo publicado (grades já interpretadas etc., ver catalogo_indices).
+    Passe o DataFrame que a sessão está usando: se o atualizador publicou uma versão
+    nova no meio do rerun, usa os índices guardados da versão anterior. Só um DataFrame
+    desconhecido tem os índices montados na hora (uma vez; depois ficam guardados).
+    """
+    indices = _dados_atuais()['indices']
+    if df_catalogo is None or indices.catalogo is df_catalogo:
+        return indices
+    with _lock_indices:
+        anteriores = _indices_anteriores.get(id(df_catalogo))
+        if anteriores is None or anteriores.catalogo is not df_catalogo:
+            anteriores = catalogo_indices.IndicesCatalogo(df_catalogo)
+            _guardar_indices_anteriores(anteriores)
+        return anteriores
+
+
+def comprados_juntos(produto_ids, quantidade=4):
+    """
+    IDs dos produtos mais comprados junto com 'produto_ids' (ex.: o produto e suas
+    variações), segundo o histórico de pedidos publicado. [] se não houver histórico.
+    """
+    return _dados_atuais()['recomendacoes'].comprados_juntos(produto_ids, quantidade)
+
+
+def _construir_catalogo(sincronizar=True):
     """
     Carrega o catálogo, aplica promoções e vídeos, e prepara o DataFrame.
     IMPORTANTE: Retorna o DataFrame com 'ID' como índice para buscas rápidas (indexação).
+    Produtos, promoções e vídeos são sincronizados em paralelo (com sincronizar=False,
+    usa as cópias locais que o atualizador em segundo plano acabou de sincronizar).
+
+    A montagem é incremental: cada etapa é guardada com o SHA dos arquivos de que
+    depende e só é refeita quando algum deles muda.
+        produtos  <- produtos_estoque.csv
+        promocoes <- promocoes.csv
+        precos    <- produtos + promocoes   (PRECO_PROMOCIONAL / PRECO_FINAL)
+        videos    <- video.csv
+        catalogo  <- precos + videos
+    """
+    if sincronizar:
+        caminhos = executar_em_paralelo({
+            nome: (lambda nome=nome: _obter_caminho_local(nome)) for nome in FONTES_CATALOGO
+        })
+    else:
+        caminhos = {nome: _caminho_sincronizado(nome) for nome in FONTES_CATALOGO}
+    # Arquivo indisponível entra com versão None (a etapa é refeita quando ele voltar)
+    v_produtos, v_promocoes, v_videos = (
+        versao_arquivo(nome) if caminhos[nome] else None for nome in FONTES_CATALOGO
+    )
+    construtor = _construtor_catalogo
+    construtor.iniciar_rodada()
+
+    df_produtos = construtor.etapa('produtos', v_produtos, lambda: _preparar_produtos(
+        _ler_produtos(caminhos[SHEET_NAME_CATALOGO_CSV])))
+    if df_produtos.empty:
+        return pd.DataFrame()
+
+    # Promoções e vídeos são só enriquecimento: se falharem, o catálogo sai sem eles
+    try:
+        df_promocoes = construtor.etapa('promocoes', v_promocoes, lambda: _preparar_promocoes(
+            _ler_arquivo_local(SHEET_NAME_PROMOCOES_CSV, caminhos[SHEET_NAME_PROMOCOES_CSV])))
+        df_precos = construtor.etapa('precos', (v_produtos, v_promocoes),
+                                     lambda: _aplicar_promocoes(df_produtos, df_promocoes))
+    except Exception as e:
+        _avisar(f"Promoções indisponíveis no momento ({e}). Exibindo os preços normais.")
+        v_promocoes = None
+        df_precos = construtor.etapa('precos', (v_produtos, None), lambda: _aplicar_promocoes(
+            df_produtos, _preparar_promocoes(None)))
+
+    try:
+        df_videos = construtor.etapa('videos', v_videos, lambda: _preparar_videos(
+            _ler_arquivo_local(SHEET_NAME_VIDEOS_CSV, caminhos[SHEET_NAME_VIDEOS_CSV])))
+    except Exception as e:
+        _avisar(f"Vídeos indisponíveis no momento ({e}).")
+        v_videos, df_videos = None, None
+    return construtor.etapa('catalogo', (v_produtos, v_promocoes, v_videos),
+                            lambda: _aplicar_videos(df_precos, df_videos))
+
+
+# Representação compacta do catálogo publicado (ver _compactar_catalogo)
+COLUNAS_DESCARTADAS_CATALOGO = [
+    'index',       # posição original da linha (sobra do reset_index do merge de promoções)
+    'ID_PRODUTO',  # chave do merge de promoções/vídeos (igual ao 'ID')
+    'DISPONIVEL',  # o catálogo publicado só tem produtos disponíveis
+]
+COLUNAS_CATEGORICAS_CATALOGO = ['CATEGORIA', 'DESCRICAOCURTA', 'CONDICAOPAGAMENTO']
+COLUNAS_INTEIRAS_CATALOGO = ['QUANTIDADE', 'RECENCIA', 'PAIID']
+PROPORCAO_MAXIMA_CATEGORICA = 0.5  # só vira categoria se tiver até 50% de valores distintos
+_memoria_catalogo = {}  # coluna -> (tipo, bytes) antes e depois da última compactação
+
+# Tempo de cada passo da última normalização do catálogo (ver tempos_carga)
+_cronometro_produtos = catalogo_pipeline.Cronometro()
+
+
+def tempos_carga():
     """
-    df_produtos = get_data_from_github(SHEET_NAME_CATALOGO_CSV)
+    Diagnóstico de desempenho da montagem do catálogo, em segundos:
+    'etapas' (produtos, promocoes, precos, videos, catalogo; da última vez que cada uma
+    foi recalculada) e 'produtos' (os passos da leitura/normalização dos produtos).
+    """
+    return {'etapas': dict(_construtor_catalogo.tempos), 'produtos': dict(_cronometro_produtos.tempos)}
+
 
+def _ler_produtos(caminho):
+    with _cronometro_produtos.medir('leitura'):
+        return _ler_arquivo_local(SHEET_NAME_CATALOGO_CSV, caminho)
+
+
+def _por_valor_unico(serie, funcao):
+    """
+    Aplica 'funcao' (Python puro) só uma vez por valor distinto da coluna e espalha o
+    resultado por índice. Usado no texto do parcelamento (formatação que não tem versão
+    vetorizada): os preços se repetem muito, então isso troca N chamadas por algumas dezenas.
+    """
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=False)
+    resultados = np.array([funcao(valor) for valor in unicos], dtype=object)
+    return resultados[codigos]
+
+
+def _texto_parcelamento(preco_cartao):
+    if preco_cartao > 0:
+        parcela = preco_cartao / 3
+        return f"3x de R$ {parcela:.2f} no cartão"
+    return 'Preço à vista'
+
+
+def _preparar_produtos(df_produtos):
+    """
+    Etapa 'produtos': valida e normaliza o 'produtos_estoque.csv' (sem promoções/vídeos).
+    Operações de coluna, exceto o texto do parcelamento, formatado uma vez por preço
+    distinto (_por_valor_unico); o tempo de cada passo fica em tempos_carga().
+    """
     if df_produtos is None or df_produtos.empty:
-        st.warning(f"Catálogo indisponível. Verifique o arquivo '{SHEET_NAME_CATALOGO_CSV}' no GitHub.")
+        _avisar(f"Catálogo indisponível. Verifique o arquivo '{SHEET_NAME_CATALOGO_CSV}' no GitHub.")
         return pd.DataFrame()
 
-    if 'ID' in df_produtos.columns:
-        df_produtos['RECENCIA'] = pd.to_numeric(df_produtos['ID'], errors='coerce')
-        df_produtos['ID'] = pd.to_numeric(df_produtos['ID'], errors='coerce').astype('Int64')
-        df_produtos.dropna(subset=['ID'], inplace=True)
-    else:
-        df_produtos['RECENCIA'] = range(len(df_produtos), 0, -1)
-        
-    # --- NOVO: Lidar com PRECOVISTA e PRECOCARTAO ---
-    colunas_minimas = ['PRECOVISTA', 'ID', 'NOME']
-    for col in colunas_minimas:
-        if col not in df_produtos.columns:
-            st.error(f"Coluna essencial '{col}' não encontrada no '{SHEET_NAME_CATALOGO_CSV}'. O aplicativo não pode continuar.")
+    with _cronometro_produtos.medir('validacao'):
+        if 'ID' in df_produtos.columns:
+            # ID já vem como Int64 pelo esquema (valores inválidos viram <NA>)
+            df_produtos['RECENCIA'] = df_produtos['ID'].astype('float64')
+            df_produtos.dropna(subset=['ID'], inplace=True)
+        else:
+            df_produtos['RECENCIA'] = range(len(df_produtos), 0, -1)
+
+        faltando = data_schemas.colunas_faltando(df_produtos, SHEET_NAME_CATALOGO_CSV)
+        if faltando:
+            _avisar(f"Coluna essencial '{faltando[0]}' não encontrada no '{SHEET_NAME_CATALOGO_CSV}'. O aplicativo não pode continuar.", "error")
             return pd.DataFrame()
-    
-    mapa_renomeacao = {'PRECOVISTA': 'PRECO', 'MARCA': 'DESCRICAOCURTA'}
-    df_produtos.rename(columns=mapa_renomeacao, inplace=True)
-    
-    if 'PRECOCARTAO' not in df_produtos.columns:
-        df_produtos['PRECOCARTAO'] = df_produtos['PRECO']
-    
-    df_produtos['PRECO'] = pd.to_numeric(df_produtos['PRECO'].astype(str).str.replace(',', '.'), errors='coerce').fillna(0.0)
-    df_produtos['PRECOCARTAO'] = pd.to_numeric(df_produtos['PRECOCARTAO'].astype(str).str.replace(',', '.'), errors='coerce').fillna(df_produtos['PRECO'])
-    
-    if 'CONDICAOPAGAMENTO' not in df_produtos.columns:
-        def gerar_condicao_pagamento(row):
-            preco_cartao = row['PRECOCARTAO']
-            if preco_cartao > 0:
-                parcela = preco_cartao / 3
-                return f"3x de R$ {parcela:.2f} no cartão"
-            return 'Preço à vista'
-            
-        df_produtos['CONDICAOPAGAMENTO'] = df_produtos.apply(gerar_condicao_pagamento, axis=1)
-    # --- Fim: Lidar com PRECOVISTA e PRECOCARTAO ---
+
+    # --- PRECOVISTA e PRECOCARTAO ---
+    with _cronometro_produtos.medir('precos'):
+        mapa_renomeacao = {'PRECOVISTA': 'PRECO', 'MARCA': 'DESCRICAOCURTA'}
+        df_produtos.rename(columns=mapa_renomeacao, inplace=True)
+
+        if 'PRECOCARTAO' not in df_produtos.columns:
+            df_produtos['PRECOCARTAO'] = df_produtos['PRECO']
+
+        # Preços já chegam como float (vírgula decimal tratada no esquema)
+        df_produtos['PRECO'] = df_produtos['PRECO'].fillna(0.0)
+        df_produtos['PRECOCARTAO'] = df_produtos['PRECOCARTAO'].fillna(df_produtos['PRECO'])
+
+    with _cronometro_produtos.medir('parcelamento'):
+        if 'CONDICAOPAGAMENTO' not in df_produtos.columns:
+            df_produtos['CONDICAOPAGAMENTO'] = _por_valor_unico(df_produtos['PRECOCARTAO'], _texto_parcelamento)
 
     coluna_foto_encontrada = None
     nomes_possiveis_foto = ['FOTOURL', 'LINKIMAGEM', 'FOTO_URL', 'IMAGEM', 'URL_FOTO', 'LINK']
@@ -241,7 +647,7 @@ def carregar_catalogo():
     if coluna_foto_encontrada:
         df_produtos.rename(columns={coluna_foto_encontrada: 'LINKIMAGEM'}, inplace=True, errors='ignore')
     else:
-        st.warning("Nenhuma coluna de imagem encontrada (Ex: FOTOURL, IMAGEM). Os produtos serão exibidos sem fotos.")
+        _avisar("Nenhuma coluna de imagem encontrada (Ex: FOTOURL, IMAGEM). Os produtos serão exibidos sem fotos.")
         df_produtos['LINKIMAGEM'] = ""
 
     df_produtos.rename(columns={'MARCA': 'DESCRICAOCURTA'}, inplace=True, errors='ignore')
@@ -251,20 +657,24 @@ def carregar_catalogo():
     if 'DESCRICAOLONGA' not in df_produtos.columns:
         df_produtos['DESCRICAOLONGA'] = df_produtos.get('CATEGORIA', '')
 
-    df_produtos = df_produtos[df_produtos['DISPONIVEL'].astype(str).str.strip().str.lower() == 'sim'].copy()
-    
-    if 'CASHBACKPERCENT' not in df_produtos.columns:
-        df_produtos['CASHBACKPERCENT'] = 0.0
-    df_produtos['CASHBACKPERCENT'] = pd.to_numeric(df_produtos['CASHBACKPERCENT'], errors='coerce').fillna(0.0)
-    
-    if 'QUANTIDADE' in df_produtos.columns:
-        df_produtos['QUANTIDADE'] = pd.to_numeric(df_produtos['QUANTIDADE'], errors='coerce').fillna(0)
-    else:
-        df_produtos['QUANTIDADE'] = 999999
-    
+    with _cronometro_produtos.medir('disponibilidade'):
+        df_produtos = df_produtos[df_produtos['DISPONIVEL'].astype(str).str.strip().str.lower() == 'sim'].copy()
 
-    df_promocoes = carregar_promocoes()
+    with _cronometro_produtos.medir('estoque_cashback'):
+        if 'CASHBACKPERCENT' not in df_produtos.columns:
+            df_produtos['CASHBACKPERCENT'] = 0.0
+        df_produtos['CASHBACKPERCENT'] = df_produtos['CASHBACKPERCENT'].fillna(0.0)
 
+        if 'QUANTIDADE' in df_produtos.columns:
+            df_produtos['QUANTIDADE'] = df_produtos['QUANTIDADE'].fillna(0)
+        else:
+            df_produtos['QUANTIDADE'] = 999999
+
+    return df_produtos
+
+
+def _aplicar_promocoes(df_produtos, df_promocoes):
+    """Etapa 'precos': junta as promoções ativas e calcula o PRECO_FINAL."""
     if not df_promocoes.empty:
         df_final = pd.merge(df_produtos.reset_index(), df_promocoes[['ID_PRODUTO', 'PRECO_PROMOCIONAL']], left_on='ID', right_on='ID_PRODUTO', how='left')
         df_final['PRECO_FINAL'] = df_final['PRECO_PROMOCIONAL'].fillna(df_final['PRECO']) 
@@ -273,36 +683,114 @@ def carregar_catalogo():
         df_final = df_produtos.reset_index()
         df_final['PRECO_FINAL'] = df_final['PRECO']
         df_final['PRECO_PROMOCIONAL'] = None
+    return df_final
 
-    df_videos = get_data_from_github(SHEET_NAME_VIDEOS_CSV)
 
-    if df_videos is not None and not df_videos.empty:
-        if 'ID_PRODUTO' in df_videos.columns and 'YOUTUBE_URL' in df_videos.columns:
-            df_videos['ID_PRODUTO'] = pd.to_numeric(df_videos['ID_PRODUTO'], errors='coerce').astype('Int64')
-            df_final = pd.merge(df_final, df_videos[['ID_PRODUTO', 'YOUTUBE_URL']], left_on='ID', right_on='ID_PRODUTO', how='left')
-            df_final.drop(columns=['ID_PRODUTO_y'], inplace=True, errors='ignore')
-            df_final.rename(columns={'ID_PRODUTO_x': 'ID_PRODUTO'}, inplace=True, errors='ignore')
-        else:
-            st.warning("Arquivo 'video.csv' encontrado, mas as colunas 'ID_PRODUTO' ou 'YOUTUBE_URL' estão faltando.")
+def _preparar_videos(df_videos):
+    """Etapa 'videos': retorna só (ID_PRODUTO, YOUTUBE_URL), ou None se não houver vídeos."""
+    if df_videos is None or df_videos.empty:
+        return None
+    if data_schemas.colunas_faltando(df_videos, SHEET_NAME_VIDEOS_CSV):
+        _avisar("Arquivo 'video.csv' encontrado, mas as colunas 'ID_PRODUTO' ou 'YOUTUBE_URL' estão faltando.")
+        return None
+    return df_videos[['ID_PRODUTO', 'YOUTUBE_URL']]
+
+
+def _aplicar_videos(df_precos, df_videos):
+    """Etapa 'catalogo': junta os vídeos e indexa por 'ID'. Não altera o df_precos guardado."""
+    if df_videos is not None:
+        df_final = pd.merge(df_precos, df_videos, left_on='ID', right_on='ID_PRODUTO', how='left')
+        df_final.drop(columns=['ID_PRODUTO_y'], inplace=True, errors='ignore')
+        df_final.rename(columns={'ID_PRODUTO_x': 'ID_PRODUTO'}, inplace=True, errors='ignore')
+    else:
+        df_final = df_precos.copy()
 
     if 'CATEGORIA' not in df_final.columns:
          df_final['CATEGORIA'] = 'Geral'
          
-    return df_final.set_index('ID')
+    return _compactar_catalogo(df_final.set_index('ID'))
+
+
+def _inteiro_compacto(serie):
+    """Menor tipo inteiro em que a coluna cabe (anulável, ex.: Int16, se tiver vazios). Com casas decimais, não mexe."""
+    valores = serie.dropna()
+    if not pd.api.types.is_numeric_dtype(serie) or not (valores == valores.round()).all():
+        return serie
+    if len(valores) == len(serie):
+        return pd.to_numeric(serie, downcast='integer')
+    tipo = pd.to_numeric(valores, downcast='integer').dtype if len(valores) else np.dtype('int8')
+    return serie.astype(tipo.name.capitalize())
+
+
+def _compactar_catalogo(df):
+    """
+    Reduz a memória do catálogo publicado (guardado uma vez e lido por todas as sessões):
+    texto repetitivo vira categoria, contagens/IDs viram o menor inteiro que cabe e as
+    colunas que a interface não usa saem. Os bytes por coluna antes/depois ficam em memory_report().
+    """
+    # Escolhidas antes de medir: contar os distintos de um texto faz o Python guardar uma
+    # cópia UTF-8 dentro de cada str (~20 bytes a mais por valor com acento), e a coluna
+    # que continua texto apareceria maior no 'depois' sem ter mudado
+    categoricas = [
+        coluna for coluna in COLUNAS_CATEGORICAS_CATALOGO
+        if coluna in df.columns and df[coluna].nunique() <= PROPORCAO_MAXIMA_CATEGORICA * len(df)
+    ]
+    antes = _memoria_por_coluna(df)
+    df = df.drop(columns=COLUNAS_DESCARTADAS_CATALOGO, errors='ignore')
+
+    for coluna in categoricas:
+        df[coluna] = df[coluna].astype('category')
+    for coluna in COLUNAS_INTEIRAS_CATALOGO:
+        if coluna in df.columns:
+            df[coluna] = _inteiro_compacto(df[coluna])
+    if 'PRECO_PROMOCIONAL' in df.columns:
+        # Sem promoções a coluna vem só com None (object): vira float com NaN
+        df['PRECO_PROMOCIONAL'] = df['PRECO_PROMOCIONAL'].astype('float64')
+
+    depois = _memoria_por_coluna(df)
+    _memoria_catalogo.clear()
+    _memoria_catalogo.update({
+        coluna: antes.get(coluna, (None, 0)) + depois.get(coluna, ('(removida)', 0))
+        for coluna in list(antes) + [c for c in depois if c not in antes]
+    })
+    return df
+
+
+def _memoria_por_coluna(df):
+    """{coluna: (tipo, bytes)}, contando o conteúdo dos textos; 'Index' é o índice."""
+    bytes_coluna = df.memory_usage(index=True, deep=True)
+    tipos = {'Index': str(df.index.dtype), **{coluna: str(tipo) for coluna, tipo in df.dtypes.items()}}
+    return {coluna: (tipos[coluna], int(bytes_coluna[coluna])) for coluna in bytes_coluna.index}
+
+
+def memory_report():
+    """
+    Memória do catálogo publicado, por coluna: tipo e bytes antes e depois da compactação
+    (_compactar_catalogo), com o total na última linha. Se o catálogo veio de um snapshot
+    (já compactado), só a parte 'depois' é conhecida: ela é medida na hora.
+    """
+    if _memoria_catalogo:
+        linhas = _memoria_catalogo
+    else:
+        linhas = {coluna: (None, None) + medida
+                  for coluna, medida in _memoria_por_coluna(carregar_catalogo()).items()}
+    relatorio = pd.DataFrame.from_dict(
+        linhas, orient='index', columns=['TIPO_ANTES', 'BYTES_ANTES', 'TIPO_DEPOIS', 'BYTES_DEPOIS'])
+    relatorio.loc['TOTAL'] = [None, relatorio['BYTES_ANTES'].sum(min_count=1), None, relatorio['BYTES_DEPOIS'].sum()]
+    return relatorio
 
 
-@st.cache_data(ttl=None) 
 def carregar_clientes_cashback():
-    """Carrega os clientes do cashback garantindo que o número de contato seja lido como texto."""
-    import pandas as pd
-    df = get_data_from_github(SHEET_NAME_CLIENTES_CASHBACK_CSV)
+    """Clientes do cashback da versão publicada (ver _dados_atuais). Não altere o DataFrame no lugar."""
+    return _dados_atuais()['clientes_cash']
 
+
+def _preparar_clientes_cashback(df):
+    """Prepara os clientes do cashback garantindo que o número de contato seja lido como texto."""
     if df is None or df.empty:
         return pd.DataFrame(columns=['NOME', 'CONTATO', 'CASHBACK_DISPONIVEL', 'NIVEL_ATUAL'])
 
-    # Garante que as colunas venham com nomes consistentes
-    df.columns = [col.strip().upper().replace(' ', '_') for col in df.columns]
-    df.rename(columns={'CASHBACK_DISPONÍVEL': 'CASHBACK_DISPONIVEL'}, inplace=True)
+    # Nomes de coluna (inclusive 'CASHBACK DISPONÍVEL') e tipos já vêm normalizados pelo esquema
 
     # Força a leitura da coluna CONTATO como texto, mesmo que pareça número
     if 'CONTATO' in df.columns:
@@ -315,7 +803,7 @@ def carregar_clientes_cashback():
         )
 
     # Garante colunas principais
-    df['CASHBACK_DISPONIVEL'] = pd.to_numeric(df['CASHBACK_DISPONIVEL'], errors='coerce').fillna(0.0)
+    df['CASHBACK_DISPONIVEL'] = df['CASHBACK_DISPONIVEL'].fillna(0.0)
     df['NIVEL_ATUAL'] = df.get('NIVEL_ATUAL', 'Prata').fillna('Prata')
 
     # Reordena colunas
@@ -326,6 +814,15 @@ def carregar_clientes_cashback():
 
 
 
+def carregar_dados_iniciais():
+    """
+    Retorna (df_catalogo_indexado, df_clientes_cash) da versão publicada.
+    Na primeira carga do processo, catálogo, cashback e cupons são carregados em paralelo.
+    """
+    dados = _dados_atuais()
+    return dados['catalogo'], dados['clientes_cash']
+
+
 def buscar_cliente_cashback(numero_contato, df_clientes_cash):
     """Busca um cliente pelo número de contato com tolerância total de formato."""
     import re
@@ -340,8 +837,8 @@ def buscar_cliente_cashback(numero_contato, df_clientes_cash):
     # Limpa número digitado (mantém apenas dígitos)
     contato_digitado = re.sub(r'\D', '', str(numero_contato or '').strip())
 
-    # Normaliza contatos do CSV
-    df_clientes_cash['CONTATO'] = (
+    # Normaliza contatos do CSV (sem alterar o DataFrame, que é compartilhado entre as sessões)
+    contatos = (
         df_clientes_cash['CONTATO']
         .astype(str)
         .str.replace(r'\D', '', regex=True)
@@ -356,7 +853,7 @@ def buscar_cliente_cashback(numero_contato, df_clientes_cash):
         possiveis.add('55' + contato_digitado)
 
     # Faz a busca
-    cliente = df_clientes_cash[df_clientes_cash['CONTATO'].isin(possiveis)]
+    cliente = df_clientes_cash[contatos.isin(possiveis)]
 
     
 
@@ -374,43 +871,11 @@ def buscar_cliente_cashback(numero_contato, df_clientes_cash):
 
 
 def salvar_pedido(nome_cliente, contato_cliente, valor_total, itens_json, pedido_data):
-    """Salva o novo pedido no 'pedidos.csv' do GitHub usando a Content API."""
+    """Salva o novo pedido no 'pedidos.csv' (no GitHub, pela Contents API, ou no DATA_BACKEND configurado)."""
     file_path = SHEET_NAME_PEDIDOS_CSV
-    api_url = f"{GITHUB_BASE_API}{file_path}"
 
     novo_cabecalho = 'ID_PEDIDO,DATA_HORA,NOME_CLIENTE,CONTATO_CLIENTE,ITENS_PEDIDO,VALOR_TOTAL,LINKIMAGEM,STATUS,itens_json'
 
-    headers_get = {
-        "Authorization": f"token {GITHUB_TOKEN}",
-        "Accept": "application/vnd.github.com.v3+json"
-    }
-
-    try:
-        response_get = requests.get(f"{api_url}?ref={BRANCH}", headers=headers_get)
-        response_get.raise_for_status()
-
-        file_data = response_get.json()
-        current_sha = file_data['sha']
-        content_base64 = file_data.get('content', '')
-
-        if not content_base64:
-            current_content = novo_cabecalho
-        else:
-            current_content = base64.b64decode(content_base64).decode('utf-8')
-
-    except requests.exceptions.HTTPError as e:
-        if e.response.status_code == 404:
-            st.info(f"Arquivo '{file_path}' não encontrado. Criando um novo.")
-            current_sha = None
-            current_content = novo_cabecalho
-        else:
-            st.error(f"Erro HTTP ao obter o SHA do arquivo no GitHub: {e}")
-            return False, None # <--- PONTO DE ERRO CRÍTICO CORRIGIDO (non-404)
-    except Exception as e:
-        st.error(f"Erro na decodificação ou leitura do arquivo 'pedidos.csv'. Detalhe: {e}")
-        return False, None # <--- PONTO DE ERRO CRÍTICO CORRIGIDO (decoding/other)
-
-    # O pedido ID só é gerado se as requisições GET acima não retornarem False.
     timestamp = int(datetime.now().timestamp())
     data_hora = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     id_pedido = timestamp
@@ -426,34 +891,19 @@ def salvar_pedido(nome_cliente, contato_cliente, valor_total, itens_json, pedido
     escaped_itens_json = itens_json.replace('"', '""')
 
     novo_registro = (
-        f'\n"{id_pedido}","{data_hora}","{nome_cliente}","{contato_cliente}",'
+        f'"{id_pedido}","{data_hora}","{nome_cliente}","{contato_cliente}",'
         f'"{resumo_itens}","{valor_total:.2f}","{link_imagem}","{status}","{escaped_itens_json}"'
     )
 
-    if current_content.strip() and current_content.strip() != novo_cabecalho:
-        new_content = current_content.strip() + novo_registro
-    else:
-        new_content = novo_cabecalho + novo_registro
-
-    encoded_content = base64.b64encode(new_content.encode('utf-8')).decode('utf-8')
-
-    commit_data = {
-        "message": f"PEDIDO: Novo pedido de {nome_cliente} - PENDENTE",
-        "content": encoded_content,
-        "branch": BRANCH
-    }
-    if current_sha:
-        commit_data["sha"] = current_sha
-
-    headers_put = {
-        "Authorization": f"token {GITHUB_TOKEN}",
-        "Accept": "application/vnd.github.com.v3+json"
-    }
-
     try:
-        response_put = requests.put(api_url, headers=headers_put, data=json.dumps(commit_data))
-        response_put.raise_for_status()
-        
+        # GitHub: commit do arquivo inteiro; pasta local/SQLite: só acrescenta a linha
+        arquivo_criado = BACKEND.anexar_linha(
+            file_path, novo_cabecalho, novo_registro,
+            f"PEDIDO: Novo pedido de {nome_cliente} - PENDENTE",
+        )
+        if arquivo_criado:
+            st.info(f"Arquivo '{file_path}' não encontrado. Criando um novo.")
+
         # PONTO DE SUCESSO
         pedido_data['id_pedido'] = id_pedido
         st.session_state.pedido_confirmado = pedido_data
@@ -0,0 +1,390 @@
+# data_schemas.py
+
+import atexit
+import importlib.util
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+# --- Tipos de coluna ---
+TEXTO = "texto"      # lido como string já no parser (ex.: telefones, códigos de barras)
+NUMERO = "numero"    # float; aceita vírgula decimal ("19,90")
+INTEIRO = "inteiro"  # inteiro anulável (Int64); valores inválidos viram <NA>
+DATA = "data"        # datetime, com o formato declarado em "formato"
+
+# Engine do pandas para ler os CSVs ("c" por padrão; "pyarrow" se instalado e configurado)
+CSV_ENGINE = os.environ.get("CSV_ENGINE", "c")
+
+# CSVs a partir deste tamanho são lidos em blocos, em paralelo (ver _ler_csv_em_blocos)
+LIMIAR_LEITURA_PARALELA = int(float(os.environ.get("CSV_PARALELO_MB", "32")) * 1024 * 1024)
+PROCESSOS_LEITURA = int(os.environ.get("CSV_PROCESSOS", os.cpu_count() or 1))
+TAMANHO_LEITURA_LIMITES = 4 * 1024 * 1024  # bytes lidos por vez ao procurar os pontos de corte
+
+# Parquet/Arrow precisam do pyarrow (dependência opcional)
+COLUNAR_DISPONIVEL = importlib.util.find_spec("pyarrow") is not None
+
+# Formatos colunares aceitos no lugar do CSV (ex.: 'produtos_estoque.parquet'), em ordem de preferência
+EXTENSOES_COLUNARES = (".parquet", ".arrow", ".feather")
+
+
+# --- Esquema de cada arquivo de dados ---
+# "colunas": nome normalizado -> tipo (ou dict com "tipo" e "formato")
+# "obrigatorias": colunas sem as quais o arquivo não pode ser usado
+# "renomear": apelidos de cabeçalho (já normalizados) -> nome esperado
+# "somente_anexo": arquivo gravado pelo app (linhas acrescentadas no CSV): nunca é
+#                  trocado por uma variante colunar, senão os registros novos sumiriam
+ESQUEMAS = {
+    "produtos_estoque.csv": {
+        "colunas": {
+            "ID": INTEIRO,
+            "PAIID": NUMERO,
+            "NOME": TEXTO,
+            "MARCA": TEXTO,
+            "CATEGORIA": TEXTO,
+            "PRECOVISTA": NUMERO,
+            "PRECOCARTAO": NUMERO,
+            "CASHBACKPERCENT": NUMERO,
+            "QUANTIDADE": NUMERO,
+            "DISPONIVEL": TEXTO,
+            "DESCRICAOLONGA": TEXTO,
+            "DESCRICAOCURTA": TEXTO,
+            "DETALHESGRADE": TEXTO,
+            "CONDICAOPAGAMENTO": TEXTO,
+            "CODIGOBARRAS": TEXTO,
+            "FOTOURL": TEXTO,
+            "LINKIMAGEM": TEXTO,
+        },
+        "obrigatorias": ["ID", "NOME", "PRECOVISTA"],
+    },
+    "promocoes.csv": {
+        "colunas": {
+            "ID_PRODUTO": INTEIRO,
+            "PRECO_PROMOCIONAL": NUMERO,
+            "STATUS": TEXTO,
+        },
+        "obrigatorias": ["ID_PRODUTO", "PRECO_PROMOCIONAL", "STATUS"],
+    },
+    "video.csv": {
+        "colunas": {
+            "ID_PRODUTO": INTEIRO,
+            "YOUTUBE_URL": TEXTO,
+        },
+        "obrigatorias": ["ID_PRODUTO", "YOUTUBE_URL"],
+    },
+    "cupons.csv": {
+        "colunas": {
+            "CODIGO": TEXTO,
+            "TIPO_DESCONTO": TEXTO,
+            "VALOR": NUMERO,
+            "DATA_VALIDADE": {"tipo": DATA, "formato": "%d/%m/%Y"},
+            "VALOR_MINIMO_PEDIDO": NUMERO,
+            "LIMITE_USOS": NUMERO,
+            "USOS_ATUAIS": NUMERO,
+            "STATUS": TEXTO,
+        },
+        "obrigatorias": ["CODIGO", "TIPO_DESCONTO", "VALOR", "DATA_VALIDADE",
+                         "VALOR_MINIMO_PEDIDO", "LIMITE_USOS", "USOS_ATUAIS", "STATUS"],
+    },
+    "clientes_cash.csv": {
+        "colunas": {
+            "NOME": TEXTO,
+            "CONTATO": TEXTO,
+            "CONTATO_LIMPO": TEXTO,
+            "CASHBACK_DISPONIVEL": NUMERO,
+            "NIVEL_ATUAL": TEXTO,
+        },
+        "obrigatorias": ["NOME", "CONTATO"],
+        "renomear": {"CASHBACK_DISPONÍVEL": "CASHBACK_DISPONIVEL"},
+    },
+    "pedidos.csv": {
+        "colunas": {
+            "ID_PEDIDO": INTEIRO,
+            "DATA_HORA": {"tipo": DATA, "formato": "%Y-%m-%d %H:%M:%S"},
+            "NOME_CLIENTE": TEXTO,
+            "CONTATO_CLIENTE": TEXTO,
+            "ITENS_PEDIDO": TEXTO,
+            "VALOR_TOTAL": NUMERO,
+            "LINKIMAGEM": TEXTO,
+            "STATUS": TEXTO,
+            "ITENS_JSON": TEXTO,
+        },
+        "obrigatorias": ["ID_PEDIDO", "ITENS_JSON"],
+        "somente_anexo": True,
+    },
+}
+
+
+def normalizar_nome_coluna(coluna):
+    """'Preco Vista ' -> 'PRECO_VISTA' (mesma regra usada em todos os arquivos)."""
+    return str(coluna).strip().upper().replace(' ', '_')
+
+
+def obter_esquema(nome_arquivo):
+    return ESQUEMAS.get(nome_arquivo, {"colunas": {}, "obrigatorias": []})
+
+
+def _tipo(definicao):
+    return definicao["tipo"] if isinstance(definicao, dict) else definicao
+
+
+def _nome_final(coluna, esquema):
+    nome = normalizar_nome_coluna(coluna)
+    return esquema.get("renomear", {}).get(nome, nome)
+
+
+def _dtypes_leitura(cabecalho, esquema):
+    """Monta o 'dtype' do read_csv (pelo nome original do cabeçalho) para as colunas de texto."""
+    dtypes = {}
+    for coluna in cabecalho:
+        definicao = esquema["colunas"].get(_nome_final(coluna, esquema))
+        if definicao is not None and _tipo(definicao) == TEXTO:
+            dtypes[coluna] = str
+    return dtypes
+
+
+def converter_texto(serie):
+    """Garante texto (ex.: código de barras que veio como número num Parquet). Vazios continuam NaN."""
+    if pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie):
+        return serie
+    if pd.api.types.is_float_dtype(serie) and (serie.dropna() == serie.dropna().round()).all():
+        serie = serie.astype('Int64')  # 41999.0 -> "41999", como no CSV
+    return serie.astype(str).where(serie.notna())
+
+
+def converter_numero(serie):
+    """
+    Converte para float aceitando vírgula decimal. Se o parser já leu como número, não mexe.
+    A troca de vírgula por ponto (operação de texto, cara) só é feita nos valores que
+    não converteram direto.
+    """
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie
+    numeros = pd.to_numeric(serie, errors='coerce')
+    falharam = numeros.isna() & serie.notna()
+    if falharam.any():
+        numeros = numeros.astype('float64')
+        numeros[falharam] = pd.to_numeric(
+            serie[falharam].astype(str).str.replace(',', '.', regex=False), errors='coerce')
+    return numeros
+
+
+def converter_inteiro(serie):
+    numeros = pd.to_numeric(converter_numero(serie), errors='coerce')
+    # Valores com casas decimais não são IDs válidos: viram <NA> em vez de quebrar o astype
+    numeros = numeros.where(numeros == numeros.round())
+    return numeros.astype('Int64')
+
+
+def aplicar_esquema(df, nome_arquivo):
+    """Normaliza os nomes das colunas e converte os tipos declarados no esquema."""
+    esquema = obter_esquema(nome_arquivo)
+    df.columns = [_nome_final(col, esquema) for col in df.columns]
+
+    for coluna, definicao in esquema["colunas"].items():
+        if coluna not in df.columns:
+            continue
+        tipo = _tipo(definicao)
+        if tipo == TEXTO:
+            df[coluna] = converter_texto(df[coluna])
+        elif tipo == NUMERO:
+            df[coluna] = converter_numero(df[coluna])
+        elif tipo == INTEIRO:
+            df[coluna] = converter_inteiro(df[coluna])
+        elif tipo == DATA and not pd.api.types.is_datetime64_any_dtype(df[coluna]):
+            df[coluna] = pd.to_datetime(df[coluna], format=definicao.get("formato"), errors='coerce')
+    return df
+
+
+def ler_csv(caminho, nome_arquivo, engine=None):
+    """
+    Lê o CSV local com o engine rápido (C/pyarrow), aplicando os dtypes de texto
+    já na leitura e convertendo as demais colunas declaradas no esquema.
+    CSVs grandes (>= LIMIAR_LEITURA_PARALELA) são lidos em blocos, em vários processos.
+    """
+    esquema = obter_esquema(nome_arquivo)
+    cabecalho = pd.read_csv(caminho, nrows=0, sep=",", encoding="utf-8").columns
+    dtype = _dtypes_leitura(cabecalho, esquema)
+    engine = engine or CSV_ENGINE
+
+    if (engine == "c" and PROCESSOS_LEITURA > 1 and LIMIAR_LEITURA_PARALELA > 0
+            and os.path.getsize(caminho) >= LIMIAR_LEITURA_PARALELA):
+        df = _ler_csv_em_blocos(caminho, nome_arquivo, dtype)
+        if df is not None:
+            return df
+    return _interpretar_csv(caminho, nome_arquivo, engine, dtype)
+
+
+def _interpretar_csv(origem, nome_arquivo, engine, dtype):
+    df = pd.read_csv(
+        origem,
+        sep=",",
+        encoding="utf-8",
+        engine=engine,
+        on_bad_lines="warn",
+        dtype=dtype,
+    )
+    return aplicar_esquema(df, nome_arquivo)
+
+
+# --- Leitura em blocos (CSVs grandes) ---
+_pool_leitura = None
+_lock_pool = threading.Lock()
+
+
+def _obter_pool():
+    """Processos de leitura, criados na primeira vez e reaproveitados (spawn: seguro com threads)."""
+    global _pool_leitura
+    with _lock_pool:
+        if _pool_leitura is None:
+            _pool_leitura = ProcessPoolExecutor(
+                max_workers=PROCESSOS_LEITURA, mp_context=multiprocessing.get_context("spawn"))
+            atexit.register(_pool_leitura.shutdown, wait=False, cancel_futures=True)
+        return _pool_leitura
+
+
+def _descartar_pool():
+    global _pool_leitura
+    with _lock_pool:
+        if _pool_leitura is not None:
+            _pool_leitura.shutdown(wait=False, cancel_futures=True)
+        _pool_leitura = None
+
+
+def _limites_blocos(arquivo, tamanho, partes, tamanho_leitura=TAMANHO_LEITURA_LIMITES):
+    """
+    Posições onde o CSV pode ser cortado em 'partes' faixas de tamanho parecido: o fim
+    do cabeçalho e depois quebras de linha que terminam um registro. Uma quebra de linha
+    dentro de um campo entre aspas tem um número ímpar de aspas antes dela ("" escapado
+    conta 2), então só valem as quebras com contagem par.
+
+    A paridade num ponto depende de todas as aspas antes dele, então o arquivo é
+    percorrido em pedaços de 'tamanho_leitura' (só um pedaço na memória por vez) até
+    o último ponto de corte, contando as aspas com bytes.count.
+    """
+    alvos = [0] + [tamanho * i // partes for i in range(1, partes)]
+    limites = []
+    aspas = 0  # aspas antes de 'contado'
+    contado = busca = inicio_pedaco = indice = 0
+    arquivo.seek(0)
+    while indice < len(alvos):
+        pedaco = arquivo.read(tamanho_leitura)
+        if not pedaco:
+            break
+        fim_pedaco = inicio_pedaco + len(pedaco)
+        while indice < len(alvos):
+            busca = max(busca, alvos[indice])
+            if busca >= fim_pedaco:
+                break
+            quebra = pedaco.find(b"\n", busca - inicio_pedaco)
+            if quebra == -1:
+                busca = fim_pedaco
+                break
+            aspas += pedaco.count(b'"', contado - inicio_pedaco, quebra)
+            contado = busca = inicio_pedaco + quebra + 1
+            if aspas % 2 == 0:
+                if not limites or busca > limites[-1]:
+                    limites.append(busca)
+                indice += 1
+        aspas += pedaco.count(b'"', contado - inicio_pedaco)
+        contado = inicio_pedaco = fim_pedaco
+    return limites + [tamanho]
+
+
+def _ler_bloco_csv(caminho, nome_arquivo, cabecalho, dtype, inicio, fim):
+    """Executa no processo de leitura: interpreta os bytes [inicio, fim) do CSV com o cabeçalho."""
+    with open(caminho, "rb") as arquivo:
+        arquivo.seek(inicio)
+        dados = cabecalho + arquivo.read(fim - inicio)
+    return _interpretar_csv(io.BytesIO(dados), nome_arquivo, "c", dtype)
+
+
+def _ler_csv_em_blocos(caminho, nome_arquivo, dtype):
+    """
+    Divide o CSV em faixas de bytes (uma por processo); cada processo interpreta a sua
+    e aplica o esquema, e os pedaços são concatenados na ordem do arquivo.
+    Retorna None (e quem chamou faz a leitura serial) se não der para garantir o mesmo
+    resultado: ex.: uma coluna fora do esquema com tipos diferentes em pedaços diferentes.
+    """
+    with open(caminho, "rb") as arquivo:
+        limites = _limites_blocos(arquivo, os.path.getsize(caminho), PROCESSOS_LEITURA)
+        arquivo.seek(0)
+        cabecalho = arquivo.read(limites[0])
+    faixas = [(inicio, fim) for inicio, fim in zip(limites, limites[1:]) if fim > inicio]
+    if len(faixas) < 2:
+        return None
+
+    try:
+        pool = _obter_pool()
+        futuros = [pool.submit(_ler_bloco_csv, caminho, nome_arquivo, cabecalho, dtype, inicio, fim)
+                   for inicio, fim in faixas]
+        pedacos = [futuro.result() for futuro in futuros]
+    except Exception:
+        _descartar_pool()  # Ex.: processo de leitura morreu; o próximo uso cria outro pool
+        return None
+
+    if not _tipos_compativeis(pedacos):
+        return None
+    return pd.concat(pedacos, ignore_index=True)
+
+
+def _tipos_compativeis(pedacos):
+    """
+    Se concatenar os pedaços dá os mesmos tipos da leitura serial. Cada coluna precisa
+    ter o mesmo tipo em todos os pedaços, ou só int64/float64: uma coluna numérica com
+    vazios em só alguns pedaços vem float64 neles e int64 nos outros, e o concat sobe
+    tudo para float64, como a leitura serial (que vê os vazios) faria.
+    """
+    if any(list(pedaco.columns) != list(pedacos[0].columns) for pedaco in pedacos[1:]):
+        return False
+    for indice in range(len(pedacos[0].columns)):
+        tipos = {pedaco.dtypes.iloc[indice] for pedaco in pedacos}
+        if len(tipos) > 1 and not tipos <= {np.dtype('int64'), np.dtype('float64')}:
+            return False
+    return True
+
+
+def variantes_arquivo(nome_arquivo):
+    """
+    Nomes em que o arquivo pode estar, em ordem de preferência:
+    'produtos_estoque.csv' -> ['produtos_estoque.parquet', 'produtos_estoque.arrow', ..., 'produtos_estoque.csv']
+    As variantes colunares só entram se o pyarrow estiver instalado, e só para as fontes
+    do catálogo em ESQUEMAS: arquivos "somente_anexo" (pedidos) e os que não estão no
+    registro (ex.: lista de leads) são sempre lidos e gravados como CSV.
+    """
+    esquema = ESQUEMAS.get(nome_arquivo)
+    if not COLUNAR_DISPONIVEL or esquema is None or esquema.get("somente_anexo"):
+        return [nome_arquivo]
+    raiz = os.path.splitext(nome_arquivo)[0]
+    return [raiz + extensao for extensao in EXTENSOES_COLUNARES] + [nome_arquivo]
+
+
+def escolher_variante(nome_arquivo, existentes):
+    """A variante preferida de 'nome_arquivo' que está em 'existentes' (ou None)."""
+    return next((nome for nome in variantes_arquivo(nome_arquivo) if nome in existentes), None)
+
+
+def ler_colunar(caminho, nome_arquivo):
+    """Lê Parquet/Arrow: sem parsing de texto; só normaliza os nomes e confere os tipos do esquema."""
+    if caminho.endswith(".parquet"):
+        df = pd.read_parquet(caminho)
+    else:
+        df = pd.read_feather(caminho)
+    return aplicar_esquema(df, nome_arquivo)
+
+
+def ler_arquivo(caminho, nome_arquivo):
+    """Lê a cópia local do arquivo pelo formato em que ela está (CSV ou colunar)."""
+    if os.path.splitext(caminho)[1] in EXTENSOES_COLUNARES:
+        return ler_colunar(caminho, nome_arquivo)
+    return ler_csv(caminho, nome_arquivo)
+
+
+def colunas_faltando(df, nome_arquivo):
+    """Lista as colunas obrigatórias (do esquema) que não estão no DataFrame."""
+    return [col for col in obter_esquema(nome_arquivo)["obrigatorias"] if col not in df.columns]
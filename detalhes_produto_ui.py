@@ -3,9 +3,8 @@
 import streamlit as st
 import pandas as pd
 import time
-import ast 
 from ui_components import adicionar_qtd_ao_carrinho, render_product_image_clickable
-from data_handler import ESTOQUE_BAIXO_LIMITE 
+from data_handler import ESTOQUE_BAIXO_LIMITE, indices_catalogo, comprados_juntos
 from streamlit_carousel import carousel 
 # from carrinho_ui import render_carrinho_popover # Este import não é necessário aqui
 
@@ -44,6 +43,9 @@ def mostrar_detalhes_produto(df_catalogo_indexado):
             st.rerun()
         return 
 
+    # Grades (DETALHESGRADE) já interpretadas na carga do catálogo
+    indices = indices_catalogo(df_catalogo_indexado)
+
     # --- LÓGICA DE VARIAÇÕES (PRODUTO PAI) --- (Sem mudanças)
     row_clicada = df_catalogo_indexado.loc[produto_id_clicado].copy()
     
@@ -64,20 +66,13 @@ def mostrar_detalhes_produto(df_catalogo_indexado):
 
     id_pai_para_buscar_filhos = id_principal_para_info 
     
-    df_variacoes = df_catalogo_indexado[
-        df_catalogo_indexado['PAIID'] == id_pai_para_buscar_filhos
-    ].copy()
+    # Filhos do pai pelo índice montado na carga (sem varrer a coluna PAIID)
+    df_variacoes = indices.variacoes(id_pai_para_buscar_filhos)
     
-    try:
-        detalhes_pai = ast.literal_eval(row_para_info.get('DETALHESGRADE', '{}'))
-        if not isinstance(detalhes_pai, dict):
-            detalhes_pai = {}
-    except:
-        detalhes_pai = {}
+    detalhes_pai = indices.grade(row_para_info.name)
 
     if detalhes_pai and not df_variacoes.empty:
-         df_variacoes = pd.concat([row_para_info.to_frame().T, df_variacoes])
-         df_variacoes = df_variacoes[~df_variacoes.index.duplicated(keep='first')]
+         df_variacoes = indices.familia(id_pai_para_buscar_filhos)
     # --- FIM LÓGICA VARIAÇÕES ---
 
     # --- 2. APLICAÇÃO DE ESTILO CSS --- (CORRIGIDO)
@@ -215,24 +210,10 @@ def mostrar_detalhes_produto(df_catalogo_indexado):
         row_produto_selecionado = None
         id_produto_selecionado = None
 
-        all_products_for_grade = pd.concat([row_para_info.to_frame().T, df_variacoes])
-        all_products_for_grade = all_products_for_grade[~all_products_for_grade.index.duplicated(keep='first')]
-        
-        products_with_grade = []
-        for idx, row in all_products_for_grade.iterrows():
-            try:
-                detalhe_str = str(row.get('DETALHESGRADE', '')).strip() 
-                if not detalhe_str or detalhe_str == 'nan' or detalhe_str == '{}':
-                    continue 
-                detalhes = ast.literal_eval(detalhe_str)
-                if isinstance(detalhes, dict) and detalhes: 
-                    products_with_grade.append(row)
-            except (ValueError, SyntaxError, NameError):
-                continue
-        
-        df_grade = pd.DataFrame(products_with_grade)
+        # Opções da grade da família, pré-calculadas na carga (atributo -> opção -> variantes)
+        matriz = indices.matriz_variacoes(id_principal_para_info)
 
-        if not df_grade.empty:
+        if matriz.variantes:
             st.markdown("---")
             st.subheader("Escolha sua variação:")
             
@@ -242,39 +223,19 @@ def mostrar_detalhes_produto(df_catalogo_indexado):
             # --- ################################################## ---
             
             # 1. Pega os detalhes do produto que foi clicado (ex: Branco, 37)
-            try:
-                detalhes_clicados_raw = ast.literal_eval(str(row_clicada.get('DETALHESGRADE', '{}')).strip())
-                if not isinstance(detalhes_clicados_raw, dict):
-                    detalhes_clicados_raw = {}
-                detalhes_clicados = {k: str(v) for k, v in detalhes_clicados_raw.items()}
-            except:
-                detalhes_clicados = {}
-
-            # 2. Descobre quais são os tipos de grade (ex: ['Cor', 'Numeração'])
-            opcoes_disponiveis = {} 
-            for idx, row_g in df_grade.iterrows():
-                detalhes_g = ast.literal_eval(str(row_g.get('DETALHESGRADE', '{}')).strip())
-                for k, v in detalhes_g.items():
-                    if k not in opcoes_disponiveis:
-                        opcoes_disponiveis[k] = set()
-                    opcoes_disponiveis[k].add(str(v))
-            
-            grade_attributes = sorted(list(opcoes_disponiveis.keys()))
+            detalhes_clicados = indices.grade(produto_id_clicado)
+
+            # 2. Tipos de grade (ex: ['Cor', 'Numeração'])
+            grade_attributes = matriz.atributos
             selecao_usuario = {}
-            df_grade_filtrada = df_grade.copy() # Começa com todos os produtos
+            variantes_filtradas = matriz.variantes # Começa com todos os produtos
             
             # 3. Faz um loop por tipo de grade (ex: primeiro 'Cor', depois 'Numeração')
             for i, tipo_grade in enumerate(grade_attributes):
                 
                 # 4. Encontra as opções válidas para *este* seletor
                 #    baseado no que já foi selecionado *antes*.
-                opcoes_validas = set()
-                for idx, row_g in df_grade_filtrada.iterrows():
-                    detalhes_g = ast.literal_eval(str(row_g.get('DETALHESGRADE', '{}')).strip())
-                    if tipo_grade in detalhes_g:
-                        opcoes_validas.add(str(detalhes_g[tipo_grade]))
-                
-                lista_opcoes = sorted(list(opcoes_validas))
+                lista_opcoes = matriz.opcoes_validas(tipo_grade, variantes_filtradas)
                 
                 if not lista_opcoes:
                     # Se não houver opções, pula este seletor
@@ -309,21 +270,15 @@ def mostrar_detalhes_produto(df_catalogo_indexado):
                     key=widget_key
                 )
                 
-                # 7. Salva a seleção e filtra o df para o *próximo* loop
+                # 7. Salva a seleção e filtra as variantes para o *próximo* loop
                 selecao_usuario[tipo_grade] = valor_selecionado
                 
-                indices_para_manter = []
-                for idx, row_g in df_grade_filtrada.iterrows():
-                    detalhes_g = ast.literal_eval(str(row_g.get('DETALHESGRADE', '{}')).strip())
-                    if str(detalhes_g.get(tipo_grade)) == valor_selecionado:
-                        indices_para_manter.append(idx)
-                
-                df_grade_filtrada = df_grade.loc[indices_para_manter]
+                variantes_filtradas = matriz.filtrar(variantes_filtradas, tipo_grade, valor_selecionado)
 
-            # 8. Ao final do loop, df_grade_filtrada conterá o produto exato
-            if not df_grade_filtrada.empty:
-                row_produto_selecionado = df_grade_filtrada.iloc[0]
-                id_produto_selecionado = row_produto_selecionado.name
+            # 8. Ao final do loop, variantes_filtradas conterá o produto exato
+            if variantes_filtradas:
+                id_produto_selecionado = variantes_filtradas[0]
+                row_produto_selecionado = indices.produto(id_produto_selecionado)
             else:
                 # Fallback final (não deve ser atingido)
                 row_produto_selecionado = row_clicada
@@ -357,11 +312,17 @@ def mostrar_detalhes_produto(df_catalogo_indexado):
         # --- 6. RENDERIZA O PREÇO (AGORA QUE TEMOS A ROW) ---
         render_price(row_produto_selecionado)
         
-        preco_final_selecionado = row_produto_selecionado['PRECO_FINAL']
+        # Variante da grade: preço e estoque já estão na matriz; sem grade, vêm da linha
+        if id_produto_selecionado in matriz.estoque:
+            preco_final_selecionado = matriz.preco[id_produto_selecionado]
+            quantidade_selecionada = matriz.estoque[id_produto_selecionado]
+        else:
+            preco_final_selecionado = row_produto_selecionado['PRECO_FINAL']
+            quantidade_selecionada = row_produto_selecionado.get('QUANTIDADE', 0)
 
 
         # --- 7. LÓGICA DE COMPRA (Quantidade e Estoque) ---
-        estoque_disponivel = int(pd.to_numeric(row_produto_selecionado.get('QUANTIDADE', 0), errors='coerce'))
+        estoque_disponivel = int(pd.to_numeric(quantidade_selecionada, errors='coerce'))
         
         st.markdown("---") 
         
@@ -441,70 +402,10 @@ def mostrar_detalhes_produto(df_catalogo_indexado):
 
 
     # --- 8. PREENCHA O PLACEHOLDER DA IMAGEM ---
-    # (Sem mudanças nesta seção)
     with image_placeholder.container():
-        image_items = []
-        urls_adicionadas = set() 
-        
-        # --- PRIORIDADE 1: Imagem da variação selecionada ---
-        if row_produto_selecionado is not None and not isinstance(row_produto_selecionado, (int, float)):
-            foto_selecionada_url = row_produto_selecionado.get('FOTOURL', row_produto_selecionado.get('LINKIMAGEM'))
-            
-            if pd.notna(foto_selecionada_url) and foto_selecionada_url not in urls_adicionadas:
-                try:
-                    detalhes_var = ast.literal_eval(row_produto_selecionado.get('DETALHESGRADE', '{}'))
-                    if isinstance(detalhes_var, dict) and detalhes_var:
-                        desc_var = ", ".join([f"{k}: {v}" for k, v in detalhes_var.items()])
-                    else:
-                        desc_var = row_produto_selecionado['NOME'] 
-                except:
-                    desc_var = row_produto_selecionado['NOME'] 
-
-                image_items.append(
-                    {
-                        "title": row_para_info['NOME'], 
-                        "text": desc_var,              
-                        "img": foto_selecionada_url,           
-                    }
-                )
-                urls_adicionadas.add(foto_selecionada_url)
-
-        # --- PRIORIDADE 2: Imagem principal (do Pai) ---
-        foto_principal_url = row_para_info.get('FOTOURL', row_para_info.get('LINKIMAGEM')) 
-        
-        if pd.notna(foto_principal_url) and foto_principal_url not in urls_adicionadas:
-            image_items.append(
-                {
-                    "title": row_para_info['NOME'],
-                    "text": row_para_info.get('CATEGORIA', row_para_info.get('MARCA', '')), 
-                    "img": foto_principal_url,
-                }
-            )
-            urls_adicionadas.add(foto_principal_url)
-        
-        # --- PRIORIDADE 3: Outras imagens de variação ---
-        if not df_variacoes.empty:
-            for idx, row_var in df_variacoes.iterrows():
-                foto_var_url = row_var.get('FOTOURL', row_var.get('LINKIMAGEM')) 
-                
-                if pd.notna(foto_var_url) and foto_var_url not in urls_adicionadas:
-                    try:
-                        detalhes_var = ast.literal_eval(row_var.get('DETALHESGRADE', '{}'))
-                        if isinstance(detalhes_var, dict) and detalhes_var:
-                            desc_var = ", ".join([f"{k}: {v}" for k, v in detalhes_var.items()])
-                        else:
-                            desc_var = row_var['NOME'] 
-                    except:
-                        desc_var = row_var['NOME'] 
-                        
-                    image_items.append(
-                        {
-                            "title": row_para_info['NOME'], 
-                            "text": desc_var,              
-                            "img": foto_var_url,           
-                        }
-                    )
-                    urls_adicionadas.add(foto_var_url)
+        # Galeria da família montada na carga do catálogo (URLs sem repetição, legendas e ordem):
+        # 1º a imagem da variação selecionada, depois a do pai, depois as outras variações
+        image_items = indices.galeria(id_principal_para_info).itens(id_produto_selecionado)
 
         # Renderiza o Carrossel
         if len(image_items) > 1:
@@ -540,28 +441,23 @@ def mostrar_detalhes_produto(df_catalogo_indexado):
     st.markdown("<br><br>", unsafe_allow_html=True)
     st.markdown("---")
     
+    # Primeiro os mais comprados junto com o produto (histórico de pedidos); as vagas
+    # que sobrarem vêm dos candidatos da mesma categoria (ou da lista reserva)
+    # (pedidos guardam o ID da variação comprada: cada produto aparece uma vez, pelo pai)
+    ids_familia = [id_principal_para_info] + list(df_variacoes.index)
+    ids_comprados = indices.principais(comprados_juntos(ids_familia, quantidade=12))
+    ids_comprados = [produto_id for produto_id in ids_comprados if produto_id not in ids_familia]
+    df_comprados = indices.produtos(ids_comprados[:4])
+    df_amostra = indices.relacionados(id_principal_para_info, quantidade=4)
+    if not df_comprados.empty:
+        df_amostra = df_amostra[~df_amostra['ID'].isin(df_comprados['ID'])]
+        df_amostra = pd.concat([df_comprados, df_amostra]).head(4).reset_index(drop=True)
+
     col_rel_1, col_rel_2 = st.columns([3, 1])
     with col_rel_1:
-        st.subheader("Quem viu, viu também")
+        st.subheader("Quem comprou, comprou também" if not df_comprados.empty else "Quem viu, viu também")
     with col_rel_2:
         pass
-
-    ids_para_excluir = [id_principal_para_info] + list(df_variacoes.index)
-    
-    categoria_pai = row_para_info.get('CATEGORIA') 
-    df_relacionados = df_catalogo_indexado[
-        (~df_catalogo_indexado.index.isin(ids_para_excluir)) &
-        (df_catalogo_indexado['CATEGORIA'] == categoria_pai) &
-        (df_catalogo_indexado['PAIID'].isna()) 
-    ]
-
-    if df_relacionados.empty:
-         df_relacionados = df_catalogo_indexado[
-            (~df_catalogo_indexado.index.isin(ids_para_excluir)) &
-            (df_catalogo_indexado['PAIID'].isna())
-        ]
-        
-    df_amostra = df_relacionados.head(4).reset_index() 
     
     if not df_amostra.empty:
         cols_cards = st.columns(len(df_amostra))
@@ -0,0 +1,95 @@
+# disjuntor.py
+
+import threading
+import time
+
+import requests
+
+import github_client
+
+
+class CircuitoAberto(requests.exceptions.ConnectionError):
+    """A fonte de dados está fora do ar: a chamada nem foi feita (ver Disjuntor)."""
+
+
+def falha_da_fonte(erro):
+    """Erros que indicam fonte fora do ar/instável. 4xx (ex.: 404, 401) são problema da requisição."""
+    if isinstance(erro, github_client.OrcamentoReservado):
+        return False  # Economia do limite da API, não falha da fonte
+    if isinstance(erro, requests.exceptions.HTTPError) and erro.response is not None:
+        return erro.response.status_code >= 500 or erro.response.status_code == 429
+    return True
+
+
+class Disjuntor:
+    """
+    Circuit breaker da fonte de dados.
+
+    Depois de 'limite_falhas' falhas seguidas, o circuito abre: as chamadas falham na
+    hora com CircuitoAberto (sem esperar timeouts), e quem chamou usa a última cópia
+    boa dos dados. Enquanto estiver aberto, uma thread em segundo plano chama 'sonda'
+    com espera crescente (de 'espera' até 'espera_maxima' segundos); quando a sonda
+    funciona, o circuito fecha e 'ao_recuperar' é chamada.
+    """
+
+    def __init__(self, sonda, ao_recuperar=None, limite_falhas=3, espera=15.0, espera_maxima=300.0):
+        self._sonda = sonda
+        self._ao_recuperar = ao_recuperar
+        self.limite_falhas = limite_falhas
+        self.espera = espera
+        self.espera_maxima = espera_maxima
+        self._falhas = 0
+        self._aberto_desde = None
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+
+    @property
+    def aberto(self):
+        return self._aberto_desde is not None
+
+    @property
+    def aberto_desde(self):
+        return self._aberto_desde
+
+    def chamar(self, funcao, *args, **kwargs):
+        if self.aberto:
+            raise CircuitoAberto("Fonte de dados indisponível; usando a última versão salva.")
+        try:
+            resultado = funcao(*args, **kwargs)
+        except Exception as e:
+            if falha_da_fonte(e):
+                self._registrar_falha()
+            raise
+        with self._lock:
+            self._falhas = 0
+        return resultado
+
+    def _registrar_falha(self):
+        with self._lock:
+            self._falhas += 1
+            if self._falhas < self.limite_falhas or self.aberto:
+                return
+            self._aberto_desde = time.time()
+        threading.Thread(target=self._sondar, name="disjuntor_sonda", daemon=True).start()
+
+    def _sondar(self):
+        espera = self.espera
+        while not self._parar.wait(espera):
+            try:
+                self._sonda()
+            except github_client.OrcamentoReservado:
+                continue  # Não dá para saber se a fonte voltou sem gastar a reserva
+            except Exception as e:
+                if falha_da_fonte(e):
+                    espera = min(espera * 2, self.espera_maxima)
+                    continue
+                # Respondeu com erro da requisição (ex.: 404): a fonte voltou
+            with self._lock:
+                self._falhas = 0
+                self._aberto_desde = None
+            if self._ao_recuperar is not None:
+                self._ao_recuperar()
+            return
+
+    def parar(self):
+        self._parar.set()
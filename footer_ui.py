@@ -1,9 +1,10 @@
 # footer_ui.py
 
 import streamlit as st
+import csv
+import io
 import textwrap
-import requests
-import base64
+import data_backends
 from datetime import datetime
 import os
 
@@ -21,40 +22,36 @@ INSTAGRAM_ICON_URL = "https://static.vecteezy.com/system/resources/previews/018/
 WHATSAPP_ICON_URL = "https://upload.wikimedia.org/wikipedia/commons/thumb/6/6b/WhatsApp.svg/2044px-WhatsApp.svg.png"
 
 # --- FUNÇÃO: Salvar CSV no GitHub ---
+ARQUIVO_LEADS_PADRAO = "newsletter_subscribers.csv"
+_backends_leads = {}  # Um backend por destino, reaproveitado entre as inscrições
+
+
+def _backend_leads():
+    """
+    Backend da lista de leads: o DATA_BACKEND local (pasta/SQLite) ou o repositório de
+    'st.secrets' pela API do GitHub. No modo "git" os leads também vão pela API: o
+    espelho git é só do repositório de dados.
+    """
+    if data_backends.TIPO_BACKEND in ("local", "sqlite"):
+        if "local" not in _backends_leads:
+            _backends_leads["local"] = data_backends.criar_backend()
+        return _backends_leads["local"], ARQUIVO_LEADS_PADRAO
+    segredos = st.secrets["github"]
+    repo = f"{segredos['owner']}/{segredos['repo']}"
+    if repo not in _backends_leads:
+        _backends_leads[repo] = data_backends.BackendGitHub(repo, None, segredos["token"])
+    return _backends_leads[repo], segredos["file_path"]
+
+
 def save_csv_github(nome, telefone):
-    # (Esta função permanece a mesma)
     try:
-        token = st.secrets["github"]["token"]
-        owner = st.secrets["github"]["owner"]
-        repo = st.secrets["github"]["repo"]
-        path = st.secrets["github"]["file_path"]
-        url = f"https://api.github.com/repos/{owner}/{repo}/contents/{path}"
-        headers = {"Authorization": f"token {token}"}
-        response = requests.get(url, headers=headers)
-        sha = None
-        current_content = ""
-        if response.status_code == 200:
-            data = response.json()
-            sha = data['sha']
-            content_encoded = data['content']
-            current_content = base64.b64decode(content_encoded).decode('utf-8')
-        elif response.status_code != 404:
-            raise Exception(f"Erro ao buscar arquivo: {response.status_code} - {response.text}")
-        new_line = f"{nome},{telefone}"
-        if not current_content:
-            new_content = f"Nome,Telefone\n{new_line}"
-        else:
-            new_content = f"{current_content}\n{new_line}"
-        content_encoded = base64.b64encode(new_content.encode('utf-8')).decode('utf-8')
-        commit_message = f"Inscrição de novo lead: {nome}"
-        payload = {"message": commit_message, "content": content_encoded}
-        if sha:
-            payload["sha"] = sha
-        response_put = requests.put(url, headers=headers, json=payload)
-        if response_put.status_code in [200, 201]:
-            return True, None
-        else:
-            return False, f"Erro ao salvar: {response_put.status_code} - {response_put.text}"
+        backend, path = _backend_leads()
+        # Aspas onde precisar: um nome como "Silva, Ana" continua sendo um campo só
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="").writerow([nome, telefone])
+        new_line = buffer.getvalue()
+        backend.anexar_linha(path, "Nome,Telefone", new_line, f"Inscrição de novo lead: {nome}")
+        return True, None
     except Exception as e:
         return False, str(e)
 
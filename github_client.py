@@ -0,0 +1,167 @@
+# github_client.py
+
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# --- Configuração do cliente HTTP (todas as chamadas à API do GitHub passam por aqui) ---
+TIMEOUT_CONEXAO = float(os.environ.get("GITHUB_TIMEOUT_CONEXAO", "3.05"))
+TIMEOUT_LEITURA = float(os.environ.get("GITHUB_TIMEOUT_LEITURA", "20"))
+MAX_TENTATIVAS = int(os.environ.get("GITHUB_MAX_TENTATIVAS", "4"))
+BACKOFF_BASE = 0.5   # segundos
+BACKOFF_MAXIMO = 8.0  # segundos
+
+# Status considerados transitórios (vale a pena tentar de novo)
+STATUS_TRANSITORIOS = {429, 500, 502, 503, 504}
+# Para PUT/POST, só os status em que o GitHub com certeza não aplicou a alteração
+# (um 500/502/504 pode chegar depois de o commit já ter sido gravado)
+STATUS_TRANSITORIOS_ESCRITA = {429, 503}
+METODOS_IDEMPOTENTES = {"GET", "HEAD", "OPTIONS"}
+
+# Fração do limite de requisições da API guardada para gravar pedidos: abaixo disso,
+# leituras não reservadas (atualização do catálogo) são recusadas e os dados ficam na última versão.
+RESERVA_ESCRITAS = float(os.environ.get("GITHUB_RESERVA_ESCRITAS", "0.1"))
+FATOR_ECONOMIA_MAXIMO = 8.0
+
+_sessao = None
+_lock_sessao = threading.Lock()
+
+# Último orçamento informado pela API (cabeçalhos X-RateLimit-*), compartilhado por todas as chamadas
+_orcamento = {"limite": None, "restante": None, "reset": None}
+_lock_orcamento = threading.Lock()
+
+
+class OrcamentoReservado(Exception):
+    """Leitura recusada: o que resta do limite da API está reservado para as gravações."""
+
+
+def get_session():
+    """
+    Retorna a sessão HTTP compartilhada (keep-alive + pool de conexões).
+    Evita um novo handshake TCP+TLS a cada chamada.
+    """
+    global _sessao
+    if _sessao is None:
+        with _lock_sessao:
+            if _sessao is None:
+                sessao = requests.Session()
+                # Retry é feito por nós (com jitter); o adapter só cuida do pool.
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0)
+                sessao.mount("https://", adapter)
+                sessao.mount("http://", adapter)
+                _sessao = sessao
+    return _sessao
+
+
+def _registrar_orcamento(response):
+    """Guarda o limite/restante/reset que a API manda em toda resposta."""
+    headers = response.headers
+    try:
+        restante = int(headers["X-RateLimit-Remaining"])
+        limite = int(headers.get("X-RateLimit-Limit", 0)) or None
+        reset = float(headers.get("X-RateLimit-Reset", 0)) or None
+    except (KeyError, TypeError, ValueError):
+        return
+    with _lock_orcamento:
+        _orcamento.update(limite=limite, restante=restante, reset=reset)
+
+
+def orcamento():
+    """
+    Cópia do último orçamento visto: {'limite', 'restante', 'reset'} (valores None antes
+    da primeira resposta). Depois do horário de 'reset', a janela já renovou.
+    """
+    with _lock_orcamento:
+        atual = dict(_orcamento)
+    if atual["reset"] is not None and time.time() >= atual["reset"]:
+        atual["restante"] = atual["limite"]
+    return atual
+
+
+def fracao_restante():
+    """Fração do limite que ainda resta (1.0 se a API ainda não informou)."""
+    atual = orcamento()
+    if not atual["limite"] or atual["restante"] is None:
+        return 1.0
+    return atual["restante"] / atual["limite"]
+
+
+def fator_economia():
+    """
+    Quanto esticar os intervalos de atualização em segundo plano: 1x com metade ou mais
+    do limite sobrando, 2x com 25%, 4x com 12,5%... até FATOR_ECONOMIA_MAXIMO.
+    """
+    fracao = fracao_restante()
+    if fracao >= 0.5:
+        return 1.0
+    return min(FATOR_ECONOMIA_MAXIMO, 0.5 / max(fracao, 0.5 / FATOR_ECONOMIA_MAXIMO))
+
+
+def _espera_backoff(tentativa, response=None):
+    """Backoff exponencial com 'full jitter'. Respeita o Retry-After quando a API manda."""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), BACKOFF_MAXIMO)
+    return random.uniform(0, min(BACKOFF_MAXIMO, BACKOFF_BASE * (2 ** tentativa)))
+
+
+def requisitar(metodo, url, **kwargs):
+    """
+    Faz a requisição pela sessão compartilhada, com timeout de conexão/leitura
+    e novas tentativas em erros de conexão e respostas 5xx/429.
+
+    Para métodos que alteram dados (PUT/POST), só repete quando a conexão nem
+    chegou a ser estabelecida ou quando o servidor recusou a requisição (429/503):
+    nesses casos o GitHub não aplicou o commit. Depois de um 500/502/504 o commit pode
+    ter sido gravado, então a resposta volta para quem chamou (ver BackendGitHub.anexar_linha).
+
+    'reservado=True' (padrão para PUT/POST) pode usar a reserva do limite da API
+    (RESERVA_ESCRITAS); as demais chamadas levantam OrcamentoReservado quando só resta a reserva.
+    """
+    metodo = metodo.upper()
+    kwargs.setdefault("timeout", (TIMEOUT_CONEXAO, TIMEOUT_LEITURA))
+    idempotente = metodo in METODOS_IDEMPOTENTES
+    transitorios = STATUS_TRANSITORIOS if idempotente else STATUS_TRANSITORIOS_ESCRITA
+    reservado = kwargs.pop("reservado", not idempotente)
+    if not reservado and fracao_restante() <= RESERVA_ESCRITAS:
+        raise OrcamentoReservado(
+            f"Limite da API quase no fim ({orcamento()['restante']} restantes); reservado para pedidos."
+        )
+    sessao = get_session()
+
+    for tentativa in range(MAX_TENTATIVAS):
+        ultima = tentativa == MAX_TENTATIVAS - 1
+        try:
+            response = sessao.request(metodo, url, **kwargs)
+        except requests.exceptions.ConnectTimeout:
+            if ultima:
+                raise
+            time.sleep(_espera_backoff(tentativa))
+            continue
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if ultima or not idempotente:
+                raise
+            time.sleep(_espera_backoff(tentativa))
+            continue
+
+        _registrar_orcamento(response)
+        if response.status_code in transitorios and not ultima:
+            espera = _espera_backoff(tentativa, response)
+            response.close()  # Devolve a conexão ao pool (com stream=True ela ficaria presa até o GC)
+            time.sleep(espera)
+            continue
+        return response
+
+
+def get(url, **kwargs):
+    return requisitar("GET", url, **kwargs)
+
+
+def put(url, **kwargs):
+    return requisitar("PUT", url, **kwargs)
@@ -0,0 +1,154 @@
+# recomendacoes.py
+
+import json
+
+import numpy as np
+import pandas as pd
+
+# Quantos produtos "comprados juntos" guardar por produto
+MAX_COMPRADOS_JUNTOS = 12
+
+
+def ler_itens_pedido(valor):
+    """
+    IDs dos produtos de um pedido, a partir do ITENS_JSON gravado pelo carrinho
+    ('{"itens": [{"id": 12, "nome": ..., "quantidade": 2}, ...], ...}'), sem repetidos
+    e na ordem do pedido. Texto inválido ou sem itens retorna [].
+    """
+    if pd.isna(valor):
+        return []
+    try:
+        itens = json.loads(str(valor)).get('itens', [])
+    except (ValueError, AttributeError):
+        return []
+    ids = []
+    for item in itens if isinstance(itens, list) else []:
+        try:
+            produto_id = int(item['id'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if produto_id not in ids:
+            ids.append(produto_id)
+    return ids
+
+
+class RecomendacoesCompra:
+    """
+    Resultado publicado do MotorRecomendacoes (só leitura, trocado inteiro a cada
+    atualização, como o catálogo).
+
+    listas: {ID: [(ID comprado junto, nº de pedidos em que os dois aparecem), ...]}
+            do mais frequente para o menos frequente
+    """
+
+    def __init__(self, listas=None, total_pedidos=0):
+        self.listas = listas or {}
+        self.total_pedidos = total_pedidos
+
+    def comprados_juntos(self, produto_ids, quantidade=4):
+        """
+        Até 'quantidade' IDs mais comprados junto com algum dos 'produto_ids' (ex.: o pai
+        e as variações), somando as contagens e sem repetir os próprios 'produto_ids'.
+        Cada ID é uma consulta ao dicionário: o custo não depende do tamanho do histórico.
+        """
+        produto_ids = set(produto_ids)
+        contagens = {}
+        for produto_id in produto_ids:
+            for outro_id, contagem in self.listas.get(produto_id, ()):
+                if outro_id not in produto_ids:
+                    contagens[outro_id] = contagens.get(outro_id, 0) + contagem
+        ordenados = sorted(contagens.items(), key=lambda par: (-par[1], par[0]))
+        return [outro_id for outro_id, _ in ordenados[:quantidade]]
+
+
+class MotorRecomendacoes:
+    """
+    Matriz de coocorrência dos pedidos (quantos pedidos têm os produtos A e B juntos),
+    guardada esparsa em arrays NumPy (formato COO: chaves linha/coluna ordenadas +
+    contagens), e as listas "comprados juntos" de cada produto tiradas dela.
+
+    É incremental: pedidos.csv só recebe linhas novas no fim, então atualizar(df_pedidos)
+    só lê as linhas depois das já processadas e só refaz as listas dos produtos que
+    aparecem nelas. Se o arquivo ficar menor (ex.: reescrito), tudo é recalculado.
+    Não é thread-safe: quem publica (o atualizador em segundo plano) é o único que
+    chama atualizar.
+    """
+
+    def __init__(self, max_por_produto=MAX_COMPRADOS_JUNTOS):
+        self.max_por_produto = max_por_produto
+        self._zerar()
+
+    def _zerar(self):
+        self._indice = {}    # ID do produto -> linha/coluna da matriz
+        self._produtos = []  # linha/coluna -> ID do produto
+        self._chaves = np.empty(0, dtype=np.int64)     # (linha << 32) | coluna, ordenadas
+        self._contagens = np.empty(0, dtype=np.int64)
+        self._linhas_processadas = 0
+        self.resultado = RecomendacoesCompra()
+
+    def atualizar(self, df_pedidos):
+        """Processa os pedidos novos de 'df_pedidos' e retorna o RecomendacoesCompra atualizado."""
+        if df_pedidos is None or df_pedidos.empty or 'ITENS_JSON' not in df_pedidos.columns:
+            return self.resultado
+        if len(df_pedidos) < self._linhas_processadas:
+            self._zerar()
+
+        # Por posição, não por ID_PEDIDO: o ID é o horário em segundos (pode repetir) e pode estar vazio
+        novos = df_pedidos['ITENS_JSON'].iloc[self._linhas_processadas:].tolist()
+        self._linhas_processadas = len(df_pedidos)
+        if not novos:
+            return self.resultado
+
+        linhas, colunas = [], []
+        for valor in novos:
+            posicoes = [self._posicao(produto_id) for produto_id in ler_itens_pedido(valor)]
+            for a in posicoes:
+                for b in posicoes:
+                    if a != b:
+                        linhas.append(a)
+                        colunas.append(b)
+        if linhas:
+            self._somar(np.asarray(linhas, dtype=np.int64), np.asarray(colunas, dtype=np.int64))
+            afetados = np.unique(linhas)
+        else:
+            afetados = np.empty(0, dtype=np.int64)
+
+        self.resultado = RecomendacoesCompra(
+            self._listas_atualizadas(afetados), self.resultado.total_pedidos + len(novos))
+        return self.resultado
+
+    def _posicao(self, produto_id):
+        posicao = self._indice.get(produto_id)
+        if posicao is None:
+            posicao = self._indice[produto_id] = len(self._produtos)
+            self._produtos.append(produto_id)
+        return posicao
+
+    def _somar(self, linhas, colunas):
+        """Soma os pares (linha, coluna) do lote às contagens acumuladas."""
+        chaves = np.concatenate([self._chaves, (linhas << 32) | colunas])
+        pesos = np.concatenate([self._contagens, np.ones(len(linhas), dtype=np.int64)])
+        self._chaves, inverso = np.unique(chaves, return_inverse=True)
+        self._contagens = np.bincount(inverso, weights=pesos).astype(np.int64)
+
+    def _listas_atualizadas(self, afetados):
+        """Cópia das listas publicadas com as dos produtos 'afetados' refeitas a partir da matriz."""
+        listas = dict(self.resultado.listas)
+        linhas = self._chaves >> 32
+        selecao = np.isin(linhas, afetados)
+        linhas = linhas[selecao]
+        colunas = self._chaves[selecao] & 0xFFFFFFFF
+        contagens = self._contagens[selecao]
+
+        # Por linha, da maior contagem para a menor (empate: produto visto primeiro)
+        ordem = np.lexsort((colunas, -contagens, linhas))
+        linhas, colunas, contagens = linhas[ordem], colunas[ordem], contagens[ordem]
+        inicios = np.flatnonzero(np.r_[True, linhas[1:] != linhas[:-1]]) if len(linhas) else []
+        fins = list(inicios[1:]) + [len(linhas)]
+        for inicio, fim in zip(inicios, fins):
+            fim = min(fim, inicio + self.max_por_produto)
+            listas[self._produtos[linhas[inicio]]] = [
+                (self._produtos[coluna], int(contagem))
+                for coluna, contagem in zip(colunas[inicio:fim], contagens[inicio:fim])
+            ]
+        return listas
@@ -0,0 +1,40 @@
+# conftest.py
+
+import os
+import sys
+
+import pytest
+
+# Os módulos do app ficam na raiz do repositório (sem pacote)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+PRODUTOS_CSV = (
+    "ID,PAIID,NOME,MARCA,CATEGORIA,PRECOVISTA,PRECOCARTAO,QUANTIDADE,DISPONIVEL,FOTOURL\n"
+    "1,,Batom Matte,Doce,Batom,30,33,5,sim,https://img/1.jpg\n"
+    "2,,Base Líquida,Bella,Base,50,55,2,sim,https://img/2.jpg\n"
+    "3,,Gloss,Doce,Batom,20,22,0,não,https://img/3.jpg\n"
+)
+PROMOCOES_CSV = "ID_PRODUTO,PRECO_PROMOCIONAL,STATUS\n1,25,ATIVO\n"
+VIDEOS_CSV = "ID_PRODUTO,YOUTUBE_URL\n2,https://youtu.be/base\n"
+
+
+@pytest.fixture
+def pasta_dados(tmp_path, monkeypatch):
+    """
+    Fontes do catálogo numa pasta local, usada como BACKEND do data_handler (com
+    etapas do catálogo e dados publicados zerados). Retorna a pasta.
+    """
+    import data_backends
+    import data_handler
+
+    pasta = tmp_path / "dados"
+    pasta.mkdir()
+    (pasta / "produtos_estoque.csv").write_text(PRODUTOS_CSV, encoding="utf-8")
+    (pasta / "promocoes.csv").write_text(PROMOCOES_CSV, encoding="utf-8")
+    (pasta / "video.csv").write_text(VIDEOS_CSV, encoding="utf-8")
+    monkeypatch.setattr(data_backends, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(data_handler, "BACKEND", data_backends.BackendDiretorio(str(pasta)))
+    monkeypatch.setattr(data_handler, "_construtor_catalogo", data_handler.catalogo_pipeline.ConstrutorIncremental())
+    monkeypatch.setattr(data_handler, "_desatualizados", {})
+    return pasta
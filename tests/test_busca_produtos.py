@@ -0,0 +1,95 @@
+# test_busca_produtos.py
+
+import pandas as pd
+
+import busca_produtos
+from busca_produtos import IndiceBusca, IndiceTrigramas
+
+
+def _produtos():
+    return pd.DataFrame({
+        'ID': [1, 2, 3, 4, 5],
+        'NOME': ['Bátom Líquido', 'Batom Matte', 'Base Líquida', 'Blush', 'Sabonete'],
+        'DESCRICAOLONGA': ['Longa duração', None, 'Cobertura alta', 'Pêssego', 'Erva-doce'],
+        'DESCRICAOCURTA': ['Doce', 'Bella', 'Doce', 'Bella', 'Doce'],
+        'CATEGORIA': ['Batom', 'Batom', 'Base', 'Blush', 'Banho'],
+    })
+
+
+def test_normalizar_texto_remove_acentos_e_maiusculas():
+    assert busca_produtos.normalizar_texto('Bátom LÍQUIDO') == 'batom liquido'
+    assert busca_produtos.tokenizar('Erva-doce, Pêssego!') == ['erva', 'doce', 'pessego']
+
+
+def test_acentos_nao_importam_nem_no_termo_nem_no_produto():
+    indice = IndiceBusca(_produtos())
+    assert indice.buscar('bátom') == indice.buscar('batom') == {1, 2}
+    assert indice.buscar('PESSEGO') == {4}
+    assert indice.buscar('líquid') == {1, 3}
+
+
+def test_prefixo_acha_todas_as_palavras_que_comecam_com_ele():
+    indice = IndiceBusca(_produtos())
+    assert indice.buscar('b') == {1, 2, 3, 4, 5}  # 'batom', 'base', 'blush', 'bella', 'banho'
+    assert indice.buscar('ba') == {1, 2, 3, 5}
+    assert indice.buscar('bas') == {3}
+    assert indice.buscar('bx') == frozenset()
+    assert indice.buscar('zzz') == frozenset()  # Depois da última palavra da lista
+
+
+def test_varias_palavras_precisam_casar_todas():
+    indice = IndiceBusca(_produtos())
+    assert indice.buscar('batom liq') == {1}
+    assert indice.buscar('liq doce') == {1, 3}
+    assert indice.buscar('batom base') == frozenset()
+    assert indice.buscar('  ') == indice.ids == {1, 2, 3, 4, 5}
+
+
+def test_cache_de_prefixos_nao_muda_o_resultado(monkeypatch):
+    monkeypatch.setattr(busca_produtos, 'MAX_PREFIXOS_EM_CACHE', 2)
+    indice = IndiceBusca(_produtos())
+    esperados = {prefixo: indice.buscar(prefixo) for prefixo in ('b', 'ba', 'd', 'l')}
+    for prefixo, ids in esperados.items():
+        assert indice.buscar(prefixo) == ids
+    assert len(indice._cache) <= 2
+
+
+def _produtos_trigramas():
+    return pd.DataFrame({
+        'ID': [10, 11, 12, 13, 14, 15],
+        'NOME': ['Batom', 'Batom', 'Batom', 'Batom', 'Sabonete', None],
+        'PRECO_PROMOCIONAL': [None, 19.9, None, None, None, None],
+        'RECENCIA': [10, 1, 50, 5, 99, 100],
+    })
+
+
+def test_busca_aproximada_tolera_erro_de_digitacao():
+    indice = IndiceTrigramas(_produtos_trigramas())
+    assert set(indice.buscar('batmo')) == {10, 11, 12, 13}
+    assert set(indice.buscar('BÁTON')) == {10, 11, 12, 13}
+    assert indice.buscar('sabonte') == [14]
+    assert indice.buscar('xyz') == []
+
+
+def test_empate_promocao_primeiro_depois_os_mais_recentes():
+    indice = IndiceTrigramas(_produtos_trigramas())
+    # Mesma semelhança: o 11 está em promoção; entre os outros, do mais recente (RECENCIA maior) ao mais antigo
+    assert indice.buscar('batom') == [11, 12, 10, 13]
+
+
+def test_mais_parecido_vem_antes_da_promocao():
+    df = pd.DataFrame({
+        'ID': [1, 2],
+        'NOME': ['Batom Matte', 'Base Matte'],
+        'PRECO_PROMOCIONAL': [None, 9.9],
+        'RECENCIA': [1, 2],
+    })
+    assert IndiceTrigramas(df).buscar('batom matte') == [1, 2]
+
+
+def test_sugestoes_respeitam_o_limite():
+    indice = IndiceTrigramas(_produtos_trigramas())
+    assert indice.sugestoes('batom') == [(11, 'Batom'), (12, 'Batom'), (10, 'Batom'), (13, 'Batom')]
+    assert indice.sugestoes('batom', quantidade=2) == [(11, 'Batom'), (12, 'Batom')]
+    assert len(indice.buscar('batom', limite=3)) == 3
+    assert indice.sugestoes('') == []
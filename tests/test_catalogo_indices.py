@@ -0,0 +1,69 @@
+# test_catalogo_indices.py
+
+import numpy as np
+import pandas as pd
+
+from catalogo_indices import IndicesCatalogo
+
+
+def test_principais_troca_variacoes_pelo_pai_sem_repetir():
+    df = pd.DataFrame({
+        'ID': [1, 2, 3, 4],
+        'NOME': ['Batom', 'Batom Rosa', 'Batom Nude', 'Base'],
+        'CATEGORIA': ['Maquiagem'] * 4,
+        'PAIID': [np.nan, 1, 1, np.nan],
+    }).set_index('ID')
+    indices = IndicesCatalogo(df)
+    assert indices.principais([2, 4, 3, 1, 99]) == [1, 4]
+
+
+def _familia_com_grade():
+    """Pai 10 e variações fora de ordem no catálogo, cada uma com preço e estoque próprios."""
+    return pd.DataFrame({
+        'ID': [10, 13, 11, 12, 20],
+        'NOME': ['Sandália', 'Sandália', 'Sandália', 'Sandália', 'Batom'],
+        'CATEGORIA': ['Calçados'] * 4 + ['Maquiagem'],
+        'PAIID': [np.nan, 10, 10, 10, np.nan],
+        'DETALHESGRADE': [
+            "{'Cor': 'Rosa', 'Numeração': '35'}",
+            "{'Cor': 'Branco', 'Numeração': '37'}",
+            "{'Cor': 'Rosa', 'Numeração': '37'}",
+            "{'Cor': 'Branco', 'Numeração': '35'}",
+            None,
+        ],
+        'PRECO_FINAL': [100.0, 130.0, 110.0, 120.0, 30.0],
+        'QUANTIDADE': [1, 4, 2, 3, 9],
+    }).set_index('ID')
+
+
+def _selecionar(matriz, escolhas):
+    """Percorre os seletores como a página de detalhes e retorna as variantes que sobram."""
+    candidatas = matriz.variantes
+    for atributo in matriz.atributos:
+        assert escolhas[atributo] in matriz.opcoes_validas(atributo, candidatas)
+        candidatas = matriz.filtrar(candidatas, atributo, escolhas[atributo])
+    return candidatas
+
+
+def test_matriz_devolve_preco_e_estoque_da_combinacao_escolhida():
+    indices = IndicesCatalogo(_familia_com_grade())
+    matriz = indices.matriz_variacoes(10)
+    assert matriz.atributos == ['Cor', 'Numeração']
+    assert sorted(matriz.variantes) == [10, 11, 12, 13]
+
+    esperados = {('Rosa', '35'): (10, 100.0, 1), ('Rosa', '37'): (11, 110.0, 2),
+                 ('Branco', '35'): (12, 120.0, 3), ('Branco', '37'): (13, 130.0, 4)}
+    for (cor, numero), (produto_id, preco, estoque) in esperados.items():
+        assert _selecionar(matriz, {'Cor': cor, 'Numeração': numero}) == [produto_id]
+        assert matriz.preco[produto_id] == preco
+        assert matriz.estoque[produto_id] == estoque
+
+
+def test_opcoes_validas_so_com_as_variantes_que_sobraram():
+    catalogo = _familia_com_grade().drop(index=11)  # Sem Rosa 37
+    matriz = IndicesCatalogo(catalogo).matriz_variacoes(10)
+    assert matriz.opcoes_validas('Cor', matriz.variantes) == ['Branco', 'Rosa']
+    rosas = matriz.filtrar(matriz.variantes, 'Cor', 'Rosa')
+    assert matriz.opcoes_validas('Numeração', rosas) == ['35']
+    assert matriz.opcoes_validas('Numeração', matriz.filtrar(matriz.variantes, 'Cor', 'Branco')) == ['35', '37']
+    assert 20 not in matriz.estoque
@@ -0,0 +1,63 @@
+# test_catalogo_pipeline.py
+
+import pandas as pd
+
+import catalogo_pipeline
+import data_handler
+
+
+def test_etapa_reaproveitada_enquanto_a_chave_nao_muda():
+    construtor = catalogo_pipeline.ConstrutorIncremental()
+    chamadas = []
+
+    def calcular(valor):
+        chamadas.append(valor)
+        return valor
+
+    assert construtor.etapa('produtos', 'v1', lambda: calcular('a')) == 'a'
+    assert construtor.etapa('produtos', 'v1', lambda: calcular('b')) == 'a'
+    assert construtor.etapa('produtos', 'v2', lambda: calcular('c')) == 'c'
+    assert chamadas == ['a', 'c']
+    assert construtor.ultimas_recalculadas == ['produtos', 'produtos']
+
+    construtor.iniciar_rodada()
+    construtor.limpar()
+    assert construtor.etapa('produtos', 'v2', lambda: calcular('d')) == 'd'
+    assert construtor.ultimas_recalculadas == ['produtos']
+
+
+def _montagem_completa():
+    """Catálogo montado do zero (sem nenhuma etapa guardada)."""
+    construtor = data_handler._construtor_catalogo
+    data_handler._construtor_catalogo = catalogo_pipeline.ConstrutorIncremental()
+    try:
+        return data_handler._construir_catalogo(sincronizar=False)
+    finally:
+        data_handler._construtor_catalogo = construtor
+
+
+def test_mudar_so_promocoes_refaz_so_as_etapas_que_dependem_dela(pasta_dados):
+    primeiro = data_handler._construir_catalogo(sincronizar=False)
+    assert data_handler._construtor_catalogo.ultimas_recalculadas == [
+        'produtos', 'promocoes', 'precos', 'videos', 'catalogo']
+    assert primeiro.loc[1, 'PRECO_FINAL'] == 25
+
+    (pasta_dados / "promocoes.csv").write_text(
+        "ID_PRODUTO,PRECO_PROMOCIONAL,STATUS\n1,25,INATIVO\n2,45,ATIVO\n", encoding="utf-8")
+    incremental = data_handler._construir_catalogo(sincronizar=False)
+
+    assert data_handler._construtor_catalogo.ultimas_recalculadas == ['promocoes', 'precos', 'catalogo']
+    assert incremental.loc[1, 'PRECO_FINAL'] == 30
+    assert incremental.loc[2, 'PRECO_FINAL'] == 45
+    pd.testing.assert_frame_equal(incremental, _montagem_completa())
+
+
+def test_mudar_so_videos_nao_refaz_produtos_nem_precos(pasta_dados):
+    data_handler._construir_catalogo(sincronizar=False)
+    (pasta_dados / "video.csv").write_text(
+        "ID_PRODUTO,YOUTUBE_URL\n1,https://youtu.be/batom\n", encoding="utf-8")
+    incremental = data_handler._construir_catalogo(sincronizar=False)
+
+    assert data_handler._construtor_catalogo.ultimas_recalculadas == ['videos', 'catalogo']
+    assert incremental.loc[1, 'YOUTUBE_URL'] == "https://youtu.be/batom"
+    pd.testing.assert_frame_equal(incremental, _montagem_completa())
@@ -0,0 +1,78 @@
+# test_catalogo_refresher.py
+
+import pytest
+
+import catalogo_refresher
+import data_handler
+import github_client
+
+
+class _Fonte:
+    """Fonte falsa: versões por arquivo, e o erro que cada sincronização deve levantar."""
+
+    def __init__(self):
+        self.versoes = {"cupons.csv": "v1", "pedidos.csv": "v1"}
+        self.erro = None
+        self.publicados = []
+
+    def sincronizar(self, nome):
+        if self.erro is not None:
+            raise self.erro
+        return self.versoes[nome]
+
+    def publicar(self, nomes):
+        self.publicados.append(nomes)
+
+
+def _atualizador(fonte, **kwargs):
+    return catalogo_refresher.AtualizadorDados(
+        {"cupons.csv": 10, "pedidos.csv": 60}, fonte.sincronizar, fonte.publicar,
+        adiamentos=(github_client.OrcamentoReservado,), **kwargs)
+
+
+def test_verificacao_adiada_nao_conta_como_erro():
+    fonte = _Fonte()
+    atualizador = _atualizador(fonte)
+    assert atualizador.executar_ciclo(agora=0) == ["cupons.csv", "pedidos.csv"]
+
+    fonte.versoes["cupons.csv"] = "v2"
+    fonte.erro = github_client.OrcamentoReservado("reservado")
+    assert atualizador.executar_ciclo(agora=10) == []
+    assert atualizador.adiados == {"cupons.csv"}
+    assert atualizador.ultimo_erro is None
+
+    # Com orçamento de volta, o arquivo é verificado no próximo intervalo e sai dos adiados
+    fonte.erro = None
+    assert atualizador.executar_ciclo(agora=20) == ["cupons.csv"]
+    assert atualizador.adiados == set()
+
+
+def test_listagem_adiada_nao_verifica_arquivo_por_arquivo():
+    fonte = _Fonte()
+    chamadas = []
+
+    def listar_versoes():
+        raise github_client.OrcamentoReservado("reservado")
+
+    def sincronizar(nome):
+        chamadas.append(nome)
+        return fonte.sincronizar(nome)
+
+    atualizador = catalogo_refresher.AtualizadorDados(
+        {"cupons.csv": 10}, sincronizar, fonte.publicar, listar_versoes=listar_versoes,
+        adiamentos=(github_client.OrcamentoReservado,))
+    assert atualizador.executar_ciclo(agora=0) == []
+    assert chamadas == []
+    assert atualizador.adiados == {"cupons.csv"}
+    assert atualizador.executar_ciclo(agora=5) == []  # Reagendado para o próximo intervalo
+
+
+def test_orcamento_reservado_nao_marca_arquivo_como_desatualizado(monkeypatch):
+    def sincronizar(nome):
+        raise github_client.OrcamentoReservado("reservado")
+
+    monkeypatch.setattr(data_handler.BACKEND, "sincronizar", sincronizar)
+    monkeypatch.setattr(data_handler, "_desatualizados", {})
+    with pytest.raises(github_client.OrcamentoReservado):
+        data_handler._sincronizar_arquivo("cupons.csv")
+    assert data_handler.arquivos_desatualizados() == {}
@@ -0,0 +1,83 @@
+# test_catalogo_snapshot.py
+
+import pandas as pd
+import pytest
+
+import catalogo_refresher
+import catalogo_snapshot
+import data_handler
+
+
+def _catalogo():
+    return pd.DataFrame({
+        'ID': pd.array([1, 2], dtype='Int64'),
+        'NOME': ['Batom', 'Base'],
+        'PRECO_FINAL': [25.0, 50.0],
+    }).set_index('ID')
+
+
+def test_chave_depende_das_versoes_das_fontes_e_do_formato(monkeypatch):
+    versoes = {'produtos_estoque.csv': 'sha1', 'promocoes.csv': 'sha2', 'video.csv': None}
+    chave = catalogo_snapshot.chave_snapshot(versoes)
+    assert chave == catalogo_snapshot.chave_snapshot(dict(reversed(list(versoes.items()))))
+    assert chave != catalogo_snapshot.chave_snapshot({**versoes, 'promocoes.csv': 'sha3'})
+
+    monkeypatch.setattr(catalogo_snapshot, "VERSAO_FORMATO", catalogo_snapshot.VERSAO_FORMATO + 1)
+    assert chave != catalogo_snapshot.chave_snapshot(versoes)
+
+
+def test_snapshot_de_outra_versao_do_formato_e_descartado(tmp_path, monkeypatch):
+    chave = catalogo_snapshot.chave_snapshot({'produtos_estoque.csv': 'sha1'})
+    catalogo_snapshot.salvar_snapshot(_catalogo(), chave, str(tmp_path))
+
+    lida, df = catalogo_snapshot.carregar_snapshot(str(tmp_path))
+    assert lida == chave
+    pd.testing.assert_frame_equal(df, _catalogo())
+
+    monkeypatch.setattr(catalogo_snapshot, "VERSAO_FORMATO", catalogo_snapshot.VERSAO_FORMATO + 1)
+    assert catalogo_snapshot.carregar_snapshot(str(tmp_path)) == (None, None)
+
+
+@pytest.fixture
+def partida(pasta_dados, monkeypatch):
+    """Executa a carga inicial do data_handler (sem a thread do atualizador); conta as montagens do catálogo."""
+    montagens = []
+    construir = data_handler._construir_catalogo
+
+    def construir_contando(*args, **kwargs):
+        montagens.append(args)
+        return construir(*args, **kwargs)
+
+    monkeypatch.setattr(data_handler, "_construir_catalogo", construir_contando)
+    monkeypatch.setattr(catalogo_refresher.AtualizadorDados, "iniciar", lambda self: None)
+    monkeypatch.setattr(data_handler, "_atualizador", None)
+    monkeypatch.setattr(data_handler, "_dados_publicados", None)
+
+    def iniciar():
+        montagens.clear()
+        data_handler._dados_publicados = None
+        data_handler._publicar_versao_inicial()
+        return data_handler._dados_publicados['catalogo']
+    return iniciar, montagens
+
+
+def test_snapshot_reaproveitado_so_enquanto_as_fontes_nao_mudam(partida, pasta_dados):
+    iniciar, montagens = partida
+    iniciar()
+    assert len(montagens) == 1  # Sem snapshot: monta e grava
+
+    # Fontes iguais: o snapshot é publicado e o atualizador não remonta o catálogo
+    catalogo = iniciar()
+    assert montagens == []
+    data_handler._atualizador.executar_ciclo(agora=0)
+    assert montagens == []
+    assert data_handler._dados_publicados['catalogo'] is catalogo
+
+    # Promoções mudaram: o snapshot só segura a partida e o 1º ciclo monta o catálogo novo
+    (pasta_dados / "promocoes.csv").write_text("ID_PRODUTO,PRECO_PROMOCIONAL,STATUS\n1,20,ATIVO\n", encoding="utf-8")
+    catalogo = iniciar()
+    assert montagens == []
+    assert catalogo.loc[1, 'PRECO_FINAL'] == 25
+    data_handler._atualizador.executar_ciclo(agora=0)
+    assert len(montagens) == 1
+    assert data_handler._dados_publicados['catalogo'].loc[1, 'PRECO_FINAL'] == 20
@@ -0,0 +1,24 @@
+# test_data_handler.py
+
+import pandas as pd
+
+import data_handler
+
+
+def test_compactacao_nao_aumenta_nenhuma_coluna():
+    """Texto gerado que continua texto (parcelas todas diferentes) não aparece maior no 'depois'."""
+    df = pd.DataFrame({
+        'ID': range(6),
+        'CATEGORIA': ['Batom'] * 3 + ['Base'] * 3,
+        'CONDICAOPAGAMENTO': [f"3x de R$ {i}.00 no cartão" for i in range(6)],
+        'DISPONIVEL': 'sim',
+    }).set_index('ID')
+
+    compactado = data_handler._compactar_catalogo(df)
+    relatorio = data_handler.memory_report()
+
+    assert str(compactado['CATEGORIA'].dtype) == 'category'
+    assert compactado['CONDICAOPAGAMENTO'].dtype == object
+    linhas = relatorio.drop(index='TOTAL')
+    assert (linhas['BYTES_DEPOIS'] <= linhas['BYTES_ANTES']).all()
+    assert relatorio.loc['TOTAL', 'BYTES_DEPOIS'] < relatorio.loc['TOTAL', 'BYTES_ANTES']
@@ -0,0 +1,66 @@
+# test_data_schemas.py
+
+import io
+
+import pandas as pd
+import pytest
+
+import data_schemas
+
+
+def _csv_produtos(linhas):
+    """CSV de produtos com quebras de linha dentro de aspas, aspas escapadas e QUANTIDADE vazia só no começo."""
+    registros = ["ID,PAIID,NOME,PRECOVISTA,QUANTIDADE,DESCRICAOLONGA,DISPONIVEL"]
+    for i in range(linhas):
+        quantidade = "" if i == 5 else str(i % 7)  # vazio só no primeiro bloco
+        descricao = f'"Linha 1 do {i}\nlinha 2 com ""aspas"", e vírgula"' if i % 3 == 0 else f"Simples {i}"
+        pai = "" if i % 4 else str(i - 1)
+        registros.append(f"{i},{pai},Produto {i},\"{i},90\",{quantidade},{descricao},sim")
+    return ("\n".join(registros) + "\n").encode("utf-8")
+
+
+def test_limites_blocos_nao_cortam_dentro_de_aspas():
+    dados = _csv_produtos(300)
+    # Pedaços de leitura pequenos: os cortes e as aspas atravessam vários pedaços
+    limites = data_schemas._limites_blocos(io.BytesIO(dados), len(dados), 5, tamanho_leitura=97)
+    assert limites[-1] == len(dados)
+    assert limites == sorted(set(limites))
+    for limite in limites[:-1]:
+        assert dados[limite - 1:limite] == b"\n"
+        assert dados[:limite].count(b'"') % 2 == 0
+
+
+@pytest.mark.parametrize("processos", [2, 3])
+def test_leitura_em_blocos_igual_a_serial(tmp_path, monkeypatch, processos):
+    caminho = tmp_path / "produtos_estoque.csv"
+    caminho.write_bytes(_csv_produtos(2000))
+    monkeypatch.setattr(data_schemas, "PROCESSOS_LEITURA", processos)
+
+    cabecalho = pd.read_csv(caminho, nrows=0).columns
+    dtype = data_schemas._dtypes_leitura(cabecalho, data_schemas.obter_esquema("produtos_estoque.csv"))
+    serial = data_schemas._interpretar_csv(caminho, "produtos_estoque.csv", "c", dtype)
+    try:
+        em_blocos = data_schemas._ler_csv_em_blocos(str(caminho), "produtos_estoque.csv", dtype)
+    finally:
+        data_schemas._descartar_pool()
+
+    assert em_blocos is not None
+    assert serial['QUANTIDADE'].isna().sum() > 0
+    pd.testing.assert_frame_equal(em_blocos, serial)
+
+
+def test_pedidos_sao_sempre_lidos_do_csv(tmp_path, monkeypatch):
+    """Com 'pedidos.parquet' na pasta, os pedidos continuam vindo do CSV que recebe as linhas novas."""
+    if not data_schemas.COLUNAR_DISPONIVEL:
+        pytest.skip("pyarrow não instalado")
+    import data_backends
+    monkeypatch.setattr(data_backends, "CACHE_DIR", str(tmp_path / "cache"))
+    pd.DataFrame({"ID": [1], "NOME": ["Batom"], "PRECOVISTA": [10.0]}).to_parquet(tmp_path / "produtos_estoque.parquet")
+    pd.DataFrame({"ID_PEDIDO": [1], "ITENS_JSON": ["{}"]}).to_parquet(tmp_path / "pedidos.parquet")
+    backend = data_backends.BackendDiretorio(str(tmp_path))
+    backend.anexar_linha("pedidos.csv", "ID_PEDIDO,ITENS_JSON", '2,"{}"', "novo pedido")
+
+    assert backend.local("produtos_estoque.csv").endswith("produtos_estoque.parquet")
+    assert backend.local("pedidos.csv").endswith("pedidos.csv")
+    assert data_schemas.variantes_arquivo("pedidos.csv") == ["pedidos.csv"]
+    assert data_schemas.variantes_arquivo("newsletter_subscribers.csv") == ["newsletter_subscribers.csv"]
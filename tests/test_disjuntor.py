@@ -0,0 +1,104 @@
+# test_disjuntor.py
+
+import threading
+
+import pytest
+import requests
+
+import data_handler
+import disjuntor
+import github_client
+
+
+def _erro_http(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.exceptions.HTTPError(f"{status}", response=response)
+
+
+def _falhar(erro):
+    def funcao(*args):
+        raise erro
+    return funcao
+
+
+@pytest.fixture
+def criar_disjuntor():
+    criados = []
+
+    def criar(sonda=lambda: None, **kwargs):
+        kwargs.setdefault("espera", 60.0)
+        criado = disjuntor.Disjuntor(sonda, **kwargs)
+        criados.append(criado)
+        return criado
+    yield criar
+    for criado in criados:
+        criado.parar()
+
+
+def test_abre_depois_de_n_falhas_seguidas(criar_disjuntor):
+    circuito = criar_disjuntor(limite_falhas=3)
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            circuito.chamar(_falhar(requests.exceptions.ConnectionError("fora do ar")))
+    assert not circuito.aberto
+    with pytest.raises(requests.exceptions.HTTPError):
+        circuito.chamar(_falhar(_erro_http(502)))
+    assert circuito.aberto
+
+    chamadas = []
+    with pytest.raises(disjuntor.CircuitoAberto):
+        circuito.chamar(chamadas.append, "não chega na fonte")
+    assert chamadas == []
+
+
+def test_sucesso_e_erros_da_requisicao_zeram_ou_nao_contam(criar_disjuntor):
+    circuito = criar_disjuntor(limite_falhas=2)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        circuito.chamar(_falhar(requests.exceptions.ConnectionError("fora do ar")))
+    assert circuito.chamar(lambda: "ok") == "ok"  # Sucesso zera a contagem
+    with pytest.raises(requests.exceptions.ConnectionError):
+        circuito.chamar(_falhar(requests.exceptions.ConnectionError("fora do ar")))
+    for erro in (_erro_http(404), github_client.OrcamentoReservado("reservado")):
+        with pytest.raises(type(erro)):
+            circuito.chamar(_falhar(erro))
+    assert not circuito.aberto
+
+
+def test_sonda_que_funciona_fecha_o_circuito(criar_disjuntor):
+    fonte_no_ar = threading.Event()
+    recuperou = threading.Event()
+
+    def sonda():
+        if not fonte_no_ar.is_set():
+            raise requests.exceptions.ConnectionError("fora do ar")
+
+    circuito = criar_disjuntor(sonda, ao_recuperar=recuperou.set, limite_falhas=1, espera=0.01, espera_maxima=0.02)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        circuito.chamar(_falhar(requests.exceptions.ConnectionError("fora do ar")))
+    assert circuito.aberto
+
+    fonte_no_ar.set()
+    assert recuperou.wait(5)
+    assert not circuito.aberto
+    assert circuito.chamar(lambda: "ok") == "ok"
+
+
+def test_ultima_copia_boa_servida_com_o_circuito_aberto(pasta_dados, criar_disjuntor, monkeypatch):
+    circuito = criar_disjuntor(limite_falhas=2)
+    monkeypatch.setattr(data_handler, "_disjuntor", circuito)
+    sincronizacoes = []
+
+    def sincronizar_fora_do_ar(nome):
+        sincronizacoes.append(nome)
+        raise requests.exceptions.ConnectionError("fora do ar")
+
+    # A cópia local (última boa) continua na pasta; só a sincronização falha
+    monkeypatch.setattr(data_handler.BACKEND, "sincronizar", sincronizar_fora_do_ar)
+    for _ in range(3):
+        df = data_handler.get_data_from_github("promocoes.csv")
+        assert df['PRECO_PROMOCIONAL'].tolist() == [25.0]
+
+    assert circuito.aberto
+    assert sincronizacoes == ["promocoes.csv"] * 2  # Aberto: a 3ª leitura nem tentou a fonte
+    assert set(data_handler.arquivos_desatualizados()) == {"promocoes.csv"}
@@ -0,0 +1,32 @@
+# test_footer_leads.py
+
+import pandas as pd
+import pytest
+
+import data_backends
+import footer_ui
+
+
+@pytest.fixture(params=["local", "sqlite"])
+def backend(request, tmp_path, monkeypatch):
+    """Backend local (pasta ou SQLite) usado pela lista de leads."""
+    if request.param == "local":
+        backend = data_backends.BackendDiretorio(str(tmp_path))
+    else:
+        backend = data_backends.BackendSQLite(str(tmp_path / "dados.db"))
+    monkeypatch.setattr(data_backends, "TIPO_BACKEND", request.param)
+    monkeypatch.setattr(footer_ui, "_backends_leads", {"local": backend})
+    return backend
+
+
+def test_nome_com_virgula_continua_um_campo(backend):
+    assert footer_ui.save_csv_github("Silva, Ana", "11 99999-0000") == (True, None)
+    assert footer_ui.save_csv_github('Bia "B" Souza', "11 98888-0000") == (True, None)
+
+    arquivo = footer_ui.ARQUIVO_LEADS_PADRAO
+    if isinstance(backend, data_backends.BackendSQLite):
+        df = backend.ler(arquivo, backend.local(arquivo))
+    else:
+        df = pd.read_csv(backend.local(arquivo), dtype=str)
+    assert [coluna.upper() for coluna in df.columns] == ["NOME", "TELEFONE"]
+    assert df.values.tolist() == [["Silva, Ana", "11 99999-0000"], ['Bia "B" Souza', "11 98888-0000"]]
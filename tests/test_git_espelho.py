@@ -0,0 +1,61 @@
+# test_git_espelho.py
+
+import os
+import subprocess
+
+import pytest
+
+import data_backends
+
+pytestmark = pytest.mark.skipif(subprocess.run(["git", "--version"], capture_output=True).returncode != 0,
+                                reason="git não instalado")
+
+
+def _git(*argumentos, cwd):
+    subprocess.run(["git", "-c", "user.name=teste", "-c", "user.email=teste@localhost", *argumentos],
+                   cwd=cwd, check=True, capture_output=True)
+
+
+def _ler(pasta, arquivo):
+    with open(os.path.join(pasta, arquivo), encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.fixture
+def repositorio(tmp_path, monkeypatch):
+    """Repositório bare local com 'pedidos.csv' na branch main, e uma cópia de trabalho dele."""
+    monkeypatch.setattr(data_backends, "CACHE_DIR", str(tmp_path / "cache"))
+    remoto = tmp_path / "dados.git"
+    _git("init", "-q", "--bare", "-b", "main", str(remoto), cwd=tmp_path)
+    trabalho = tmp_path / "trabalho"
+    _git("clone", "-q", str(remoto), str(trabalho), cwd=tmp_path)
+    _git("checkout", "-q", "-b", "main", cwd=trabalho)
+    (trabalho / "pedidos.csv").write_text("ID_PEDIDO,ITENS_JSON\n", encoding="utf-8")
+    _git("add", "pedidos.csv", cwd=trabalho)
+    _git("commit", "-q", "-m", "inicial", cwd=trabalho)
+    _git("push", "-q", "origin", "main", cwd=trabalho)
+    return remoto, trabalho
+
+
+def test_gravacao_pendente_reaplicada_depois_de_commit_no_remoto(repositorio, tmp_path):
+    remoto, trabalho = repositorio
+    espelho = data_backends.BackendGitEspelho(f"file://{remoto}", "main", intervalo_envio=3600)
+    try:
+        assert espelho.sincronizar("pedidos.csv") is not None
+
+        # A branch anda no remoto depois do clone do espelho
+        (trabalho / "video.csv").write_text("ID_PRODUTO,VIDEO\n", encoding="utf-8")
+        _git("add", "video.csv", cwd=trabalho)
+        _git("commit", "-q", "-m", "outro commit", cwd=trabalho)
+        _git("push", "-q", "origin", "main", cwd=trabalho)
+
+        espelho.anexar_linha("pedidos.csv", "ID_PEDIDO,ITENS_JSON", '1,"{}"', "pedido 1")
+        assert espelho.enviar_pendentes()  # 1º push recusado: busca, reaplica e envia de novo
+        assert not os.path.exists(espelho._caminho_pendentes())
+    finally:
+        espelho.finalizar()
+
+    conferencia = tmp_path / "conferencia"
+    _git("clone", "-q", str(remoto), str(conferencia), cwd=tmp_path)
+    assert _ler(conferencia, "pedidos.csv").splitlines() == ["ID_PEDIDO,ITENS_JSON", '1,"{}"']
+    assert os.path.exists(conferencia / "video.csv")
@@ -0,0 +1,81 @@
+# test_github_client.py
+
+import io
+
+import pytest
+import requests
+
+import data_backends
+import github_client
+
+
+class _SessaoFalsa:
+    """Responde com os status da lista, na ordem, e guarda os métodos pedidos."""
+
+    def __init__(self, status):
+        self.status = list(status)
+        self.metodos = []
+
+    def request(self, metodo, url, **kwargs):
+        self.metodos.append(metodo)
+        response = requests.Response()
+        response.status_code = self.status.pop(0)
+        response.url = url
+        response.raw = io.BytesIO(b"")
+        return response
+
+
+@pytest.fixture
+def sessao(monkeypatch):
+    def criar(*status):
+        falsa = _SessaoFalsa(status)
+        monkeypatch.setattr(github_client, "get_session", lambda: falsa)
+        return falsa
+    monkeypatch.setattr(github_client.time, "sleep", lambda segundos: None)
+    monkeypatch.setattr(github_client, "_orcamento", {"limite": None, "restante": None, "reset": None})
+    return criar
+
+
+def test_get_repete_em_502(sessao):
+    falsa = sessao(502, 200)
+    assert github_client.get("https://api.github.com/x").status_code == 200
+    assert falsa.metodos == ["GET", "GET"]
+
+
+@pytest.mark.parametrize("status", [500, 502, 504])
+def test_put_nao_repete_quando_o_commit_pode_ter_sido_gravado(sessao, status):
+    falsa = sessao(status, 200)
+    assert github_client.put("https://api.github.com/x").status_code == status
+    assert falsa.metodos == ["PUT"]
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_put_repete_quando_o_servidor_recusou(sessao, status):
+    falsa = sessao(status, 201)
+    assert github_client.put("https://api.github.com/x").status_code == 201
+    assert falsa.metodos == ["PUT", "PUT"]
+
+
+@pytest.mark.parametrize("status", [409, 502])
+def test_anexar_linha_confere_o_arquivo_antes_de_dar_erro(sessao, monkeypatch, status):
+    backend = data_backends.BackendGitHub("loja/dados", None, "token")
+    gravado = {"conteudo": "ID_PEDIDO,ITENS_JSON\n1,{}"}
+
+    def ler_conteudo(arquivo):
+        return gravado["conteudo"], "sha"
+
+    def put_aplicado(url, **kwargs):
+        # O commit foi gravado, mas a resposta que chega é de erro
+        gravado["conteudo"] += "\n2,{}"
+        response = requests.Response()
+        response.status_code = status
+        return response
+
+    monkeypatch.setattr(backend, "ler_conteudo", ler_conteudo)
+    monkeypatch.setattr(github_client, "put", put_aplicado)
+    assert backend.anexar_linha("pedidos.csv", "ID_PEDIDO,ITENS_JSON", "2,{}", "pedido") is False
+
+    # Se o arquivo não tem a linha, o erro continua sendo reportado
+    monkeypatch.setattr(backend, "ler_conteudo", lambda arquivo: ("ID_PEDIDO,ITENS_JSON\n1,{}", "sha"))
+    with pytest.raises(requests.exceptions.HTTPError):
+        backend.anexar_linha("pedidos.csv", "ID_PEDIDO,ITENS_JSON", "3,{}", "pedido")
@@ -0,0 +1,41 @@
+# test_recomendacoes.py
+
+import json
+
+import pandas as pd
+
+from recomendacoes import MotorRecomendacoes
+
+
+def _pedido(pedido_id, produto_ids):
+    itens = [{"id": produto_id, "nome": f"P{produto_id}", "quantidade": 1} for produto_id in produto_ids]
+    return {"ID_PEDIDO": pedido_id, "ITENS_JSON": json.dumps({"itens": itens})}
+
+
+def test_atualizar_duas_vezes_o_mesmo_arquivo_nao_conta_de_novo():
+    df = pd.DataFrame([_pedido(None, [1, 5]), _pedido(10, [1, 5, 6])])
+    motor = MotorRecomendacoes()
+    primeiro = motor.atualizar(df)
+    segundo = motor.atualizar(df)
+    assert segundo.listas == primeiro.listas
+    assert segundo.listas[1] == [(5, 2), (6, 1)]
+    assert segundo.total_pedidos == 2
+
+
+def test_pedido_novo_com_id_repetido_entra():
+    df = pd.DataFrame([_pedido(10, [1, 5])])
+    motor = MotorRecomendacoes()
+    motor.atualizar(df)
+    # Mesmo ID_PEDIDO (gravado no mesmo segundo), acrescentado depois
+    resultado = motor.atualizar(pd.concat([df, pd.DataFrame([_pedido(10, [7, 8])])], ignore_index=True))
+    assert resultado.listas[7] == [(8, 1)]
+    assert resultado.listas[1] == [(5, 1)]
+
+
+def test_arquivo_menor_recalcula_tudo():
+    df = pd.DataFrame([_pedido(1, [1, 5]), _pedido(2, [1, 6])])
+    motor = MotorRecomendacoes()
+    motor.atualizar(df)
+    resultado = motor.atualizar(df.iloc[1:])
+    assert resultado.listas == {1: [(6, 1)], 6: [(1, 1)]}
+    assert resultado.comprados_juntos([1]) == [6]
@@ -3,10 +3,9 @@
 import streamlit as st
 import pandas as pd
 import time
-import ast
 import requests
 import json
-from data_handler import ESTOQUE_BAIXO_LIMITE # Importa a constante de limite
+from data_handler import ESTOQUE_BAIXO_LIMITE, indices_catalogo # Importa a constante de limite
 
 # --- Funções de Manipulação do Carrinho e Estado ---
 
@@ -53,19 +52,13 @@ def adicionar_qtd_ao_carrinho(produto_row, quantidade, preco_final):
     produto_nome_base = produto_row.get('NOME', 'Produto sem nome')
     produto_nome_final = produto_nome_base
     
-    try:
-        # Tenta ler os detalhes da grade (ex: "{'Cor': 'Preto', 'Tamanho': 'G'}")
-        detalhes_str = produto_row.get('DETALHESGRADE', '{}')
-        if pd.notna(detalhes_str) and detalhes_str.strip() not in ('{}', 'nan', ''):
-            detalhes_dict = ast.literal_eval(detalhes_str)
-            if isinstance(detalhes_dict, dict) and detalhes_dict:
-                # Formata os detalhes: "Cor: Preto, Tamanho: G"
-                detalhes_formatados = ", ".join([f"{k}: {v}" for k, v in detalhes_dict.items()])
-                # Cria o nome final: "Produto (Cor: Preto, Tamanho: G)"
-                produto_nome_final = f"{produto_nome_base} ({detalhes_formatados})"
-    except Exception as e:
-        # Se falhar a formatação, usa o nome base
-        pass 
+    # Detalhes da grade já interpretados na carga do catálogo (ex: {'Cor': 'Preto', 'Tamanho': 'G'})
+    detalhes_dict = indices_catalogo(st.session_state.df_catalogo_indexado).grade(produto_id)
+    if detalhes_dict:
+        # Formata os detalhes: "Cor: Preto, Tamanho: G"
+        detalhes_formatados = ", ".join([f"{k}: {v}" for k, v in detalhes_dict.items()])
+        # Cria o nome final: "Produto (Cor: Preto, Tamanho: G)"
+        produto_nome_final = f"{produto_nome_base} ({detalhes_formatados})"
     # --- FIM CORREÇÃO 2 ---
 
     